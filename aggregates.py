@@ -0,0 +1,200 @@
+from collections import defaultdict
+
+from sqlalchemy import and_, case, func, select, tuple_
+
+from database import SessionLocal
+from logger import logger
+from models import IncidentEvent, Match, MatchTeamStats, TeamSeasonStats
+
+FINISHED = 6
+
+PASS = 1
+SHOTS_ON_TARGET = (15, 16)
+YELLOW_CARD = 31
+RED_CARDS = (32, 33)
+
+EVENT_TOTALS = (
+    "shots",
+    "shots_on_target",
+    "passes",
+    "passes_completed",
+    "yellow_cards",
+    "red_cards",
+)
+
+FORM_LENGTH = 5
+CHUNK_SIZE = 500
+
+
+def _count(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _event_totals(session, match_ids: list[int]) -> dict[tuple[int, int], dict]:
+    rows = session.execute(
+        select(
+            IncidentEvent.match_id,
+            IncidentEvent.team_id,
+            _count(IncidentEvent.is_shot).label("shots"),
+            _count(
+                and_(
+                    IncidentEvent.is_shot,
+                    IncidentEvent.type_value.in_(SHOTS_ON_TARGET),
+                )
+            ).label("shots_on_target"),
+            _count(IncidentEvent.type_value == PASS).label("passes"),
+            _count(
+                and_(
+                    IncidentEvent.type_value == PASS,
+                    IncidentEvent.outcome_type_value == 1,
+                )
+            ).label("passes_completed"),
+            _count(IncidentEvent.card_type_value == YELLOW_CARD).label("yellow_cards"),
+            _count(IncidentEvent.card_type_value.in_(RED_CARDS)).label("red_cards"),
+        )
+        .where(IncidentEvent.match_id.in_(match_ids))
+        .group_by(IncidentEvent.match_id, IncidentEvent.team_id)
+    ).all()
+    return {
+        (row.match_id, row.team_id): {
+            key: row._mapping[key] or 0 for key in EVENT_TOTALS
+        }
+        for row in rows
+    }
+
+
+def _result(goals_for: int | None, goals_against: int | None, status: int) -> str:
+    if status != FINISHED or goals_for is None or goals_against is None:
+        return None
+    if goals_for > goals_against:
+        return "W"
+    if goals_for < goals_against:
+        return "L"
+    return "D"
+
+
+def refresh_match_stats(session, match_ids: list[int]) -> set[tuple]:
+    """Recomputes ``match_team_stats`` of the given matches.
+
+    Returns the ``(tournament_id, season, team_id)`` keys of the season rows
+    the matches belong to. The season is the match's own, as a tournament id
+    is shared by every season of a league.
+    """
+    matches = session.scalars(select(Match).where(Match.id.in_(match_ids))).all()
+    totals = _event_totals(session, match_ids)
+
+    session.query(MatchTeamStats).filter(MatchTeamStats.match_id.in_(match_ids)).delete(
+        synchronize_session=False
+    )
+
+    season_keys = set()
+    for match in matches:
+        sides = (
+            (match.home_team_id, True, match.home_score, match.away_score),
+            (match.away_team_id, False, match.away_score, match.home_score),
+        )
+        for team_id, is_home, goals_for, goals_against in sides:
+            session.add(
+                MatchTeamStats(
+                    match_id=match.id,
+                    team_id=team_id,
+                    tournament_id=match.tournament_id,
+                    season=match.season,
+                    start_time=match.start_time,
+                    is_home=is_home,
+                    result=_result(goals_for, goals_against, match.status),
+                    goals_for=goals_for,
+                    goals_against=goals_against,
+                    **(
+                        totals.get((match.id, team_id))
+                        or dict.fromkeys(EVENT_TOTALS, 0)
+                    ),
+                )
+            )
+            season_keys.add((match.tournament_id, match.season, team_id))
+    return season_keys
+
+
+def refresh_season_stats(session, season_keys: set[tuple]) -> None:
+    """Rebuilds ``team_season_stats`` rows from their finished match rows."""
+    season_keys = [key for key in season_keys if None not in key]
+    if not season_keys:
+        return
+
+    key_columns = tuple_(
+        MatchTeamStats.tournament_id,
+        MatchTeamStats.season,
+        MatchTeamStats.team_id,
+    )
+    rows = session.scalars(
+        select(MatchTeamStats)
+        .where(key_columns.in_(season_keys), MatchTeamStats.result.is_not(None))
+        .order_by(MatchTeamStats.start_time)
+    ).all()
+
+    session.query(TeamSeasonStats).filter(
+        tuple_(
+            TeamSeasonStats.tournament_id,
+            TeamSeasonStats.season,
+            TeamSeasonStats.team_id,
+        ).in_(season_keys)
+    ).delete(synchronize_session=False)
+
+    stats = defaultdict(lambda: defaultdict(int))
+    results = defaultdict(str)
+    for row in rows:
+        key = (row.tournament_id, row.season, row.team_id)
+        totals = stats[key]
+        totals["played"] += 1
+        totals[{"W": "won", "D": "drawn", "L": "lost"}[row.result]] += 1
+        totals["goals_for"] += row.goals_for
+        totals["goals_against"] += row.goals_against
+        totals["shots"] += row.shots
+        totals["passes_completed"] += row.passes_completed
+        results[key] += row.result
+
+    for key, totals in stats.items():
+        tournament_id, season, team_id = key
+        session.add(
+            TeamSeasonStats(
+                tournament_id=tournament_id,
+                season=season,
+                team_id=team_id,
+                points=3 * totals["won"] + totals["drawn"],
+                form=results[key][-FORM_LENGTH:],
+                **totals,
+            )
+        )
+
+
+def materialize_stats(match_ids) -> None:
+    """Refreshes the aggregate tables for the matches touched by this run.
+
+    Only the ``match_team_stats`` rows of ``match_ids`` and the season rows of
+    their teams are recomputed, everything else is left as it is.
+    """
+    match_ids = sorted(set(match_ids))
+    if not match_ids:
+        return
+
+    logger.info(f"Materializing stats of {len(match_ids)} matches...")
+    with SessionLocal() as session:
+        season_keys = set()
+        for start in range(0, len(match_ids), CHUNK_SIZE):
+            season_keys |= refresh_match_stats(
+                session, match_ids[start : start + CHUNK_SIZE]
+            )
+        session.flush()
+
+        season_keys = list(season_keys)
+        for start in range(0, len(season_keys), CHUNK_SIZE):
+            refresh_season_stats(session, set(season_keys[start : start + CHUNK_SIZE]))
+        session.commit()
+    logger.info("Stats have been materialized successfully!")
+
+
+def rebuild_stats() -> None:
+    """Materializes the stats of every match, e.g. of an existing database."""
+    with SessionLocal() as session:
+        match_ids = session.scalars(select(Match.id)).all()
+    materialize_stats(match_ids)
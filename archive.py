@@ -0,0 +1,218 @@
+import asyncio
+import functools
+import glob
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from tqdm import tqdm
+
+from constants import REPARSE_WORKERS
+from journal import FAILED, PARSED
+from logger import logger
+from parsers import PARSER_VERSION, MatchPage, extract_match_page, parse_match_html
+from pipeline import defers_fingerprints, publish_page, write_json_files
+from utils import content_hash, find_raw_html_files, write_file
+from writer import write_file_async
+
+MANIFEST_NAME = "manifest.json"
+
+SKIPPED = "skipped"
+
+
+class Manifest:
+    """Fingerprints of the pages of one ``matches/<league>/<month>`` directory.
+
+    Every match id maps to the hash of its raw page (``html``), the parser
+    version that extracted it and the hash of its ``matchCentreData``
+    (``data``), so unchanged pages are neither parsed nor written again.
+    """
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.entries: dict[str, dict] = {}
+        self._changed = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            logger.error(f"Ignoring the corrupt manifest {self.path}: {e}")
+
+    def get(self, match_id) -> dict:
+        return self.entries.get(str(match_id), {})
+
+    def is_parsed(self, match_id, html_hash: str) -> bool:
+        entry = self.get(match_id)
+        return entry.get("html") == html_hash and entry.get("parser") == PARSER_VERSION
+
+    def update(self, match_id, **fingerprints) -> None:
+        entry = self.entries.setdefault(str(match_id), {})
+        if any(entry.get(key) != value for key, value in fingerprints.items()):
+            entry.update(fingerprints)
+            self._changed = True
+
+    def forget(self, match_id) -> None:
+        if self.entries.pop(str(match_id), None) is not None:
+            self._changed = True
+
+    def save(self) -> None:
+        if self._changed:
+            write_file(self.path, self.entries, is_json=True)
+            self._changed = False
+
+
+# Manifests of the directories touched by this process, saved by save_manifests.
+# Processes sharing a directory may overwrite each other's entries, which only
+# costs a redundant parse later.
+_manifests: dict[str, Manifest] = {}
+
+
+def get_manifest(directory: str) -> Manifest:
+    if directory not in _manifests:
+        _manifests[directory] = Manifest(directory)
+    return _manifests[directory]
+
+
+def save_manifests() -> None:
+    for manifest in _manifests.values():
+        manifest.save()
+
+
+def forget_page(league_name: str, month: str, match_id) -> None:
+    """Drops the fingerprints of a page whose data could not be populated.
+
+    The next fetch of the page is parsed and returned as changed again.
+    """
+    get_manifest(f"matches/{league_name}/{month}").forget(match_id)
+
+
+async def parse_page(
+    content: str, league_name: str, month: str, match_id, deferred: bool = False
+) -> MatchPage | None:
+    """Parses a fetched match page unless the same page was parsed before.
+
+    Returns the parsed page when its match centre data changed, i.e. the
+    match has new data to populate, None otherwise. Its JSON files are on
+    disk by then, written by the shared writer. With ``deferred`` the
+    fingerprints of a changed page are left for the caller to record, once
+    its data is stored.
+    """
+    manifest = get_manifest(f"matches/{league_name}/{month}")
+    html_hash = content_hash(content)
+    if manifest.is_parsed(match_id, html_hash):
+        return None
+
+    known_hash = manifest.get(match_id).get("data")
+    page, files = extract_match_page(
+        content, month, league_name, known_hash, write_files=write_json_files()
+    )
+    await asyncio.gather(
+        *(
+            write_file_async(file_name, file_content, is_json=True, wait=True)
+            for file_name, file_content in files.items()
+        )
+    )
+    data_hash = page.data_hash if page else None
+    changed = page is not None and data_hash != known_hash
+    if not (changed and deferred):
+        manifest.update(match_id, html=html_hash, data=data_hash, parser=PARSER_VERSION)
+    return page if changed else None
+
+
+async def store_page(
+    content: str, league_name: str, month: str, match_id
+) -> MatchPage | None:
+    """Writes ``raw_html_<id>.html`` and parses it, see :func:`parse_page`.
+
+    Returns once the raw page is on disk. Nothing is written when the page is
+    the same as the one parsed last time.
+    Changed pages are also handed to the database sink of a ``--stream`` run,
+    or to the collector of ``--run`` and ``--fetch-recent``, which record
+    their fingerprints once they have inserted them.
+    """
+    directory = f"matches/{league_name}/{month}"
+    manifest = get_manifest(directory)
+    html_hash = content_hash(content)
+    if manifest.is_parsed(match_id, html_hash):
+        return None
+
+    # Wait for the raw page, so a page reported as stored is on disk.
+    await write_file_async(f"{directory}/raw_html_{match_id}.html", content, wait=True)
+    deferred = defers_fingerprints()
+    page = await parse_page(content, league_name, month, match_id, deferred=deferred)
+    if page and deferred:
+        await publish_page(
+            page,
+            f"{directory}/match_centre_data_{match_id}.json",
+            functools.partial(
+                manifest.update,
+                match_id,
+                html=html_hash,
+                data=page.data_hash,
+                parser=PARSER_VERSION,
+            ),
+        )
+    return page
+
+
+def _reparse_month(directory: str, force: bool) -> Counter:
+    league_name, month = directory.split(os.sep)[-2:]
+    manifest = Manifest(directory)
+    results = Counter()
+
+    for path in sorted(glob.glob(os.path.join(directory, "raw_html_*.html"))):
+        match_id = os.path.basename(path).split("_")[-1].split(".")[0]
+        with open(path, "rb") as file:
+            content = file.read()
+
+        html_hash = content_hash(content)
+        if not force and manifest.is_parsed(match_id, html_hash):
+            results[SKIPPED] += 1
+            continue
+
+        known_hash = manifest.get(match_id).get("data")
+        try:
+            page = parse_match_html(
+                content.decode("utf-8"), month, league_name, known_hash
+            )
+        except Exception as e:
+            logger.error(f"Failed to re-parse {path}: {e}")
+            results[FAILED] += 1
+            continue
+
+        data_hash = page.data_hash if page else None
+        manifest.update(match_id, html=html_hash, data=data_hash, parser=PARSER_VERSION)
+        results[PARSED] += 1
+
+    manifest.save()
+    return results
+
+
+def reparse_archive(force: bool = False, workers: int = REPARSE_WORKERS) -> Counter:
+    """Extracts the match data of every stored ``raw_html_<id>.html`` page again.
+
+    Nothing is fetched. Month directories are processed in parallel, and pages
+    whose bytes and parser version match their manifest entry are skipped
+    unless ``force`` is set.
+    """
+    directories = sorted({os.path.dirname(path) for path in find_raw_html_files()})
+    logger.info(f"Re-parsing the raw pages of {len(directories)} month directories")
+
+    results = Counter()
+    with ProcessPoolExecutor(workers) as executor:
+        for month_results in tqdm(
+            executor.map(_reparse_month, directories, repeat(force)),
+            total=len(directories),
+            desc="Re-parsing pages",
+        ):
+            results.update(month_results)
+
+    logger.info(
+        f"Re-parse done: {results[PARSED]} parsed, {results[SKIPPED]} unchanged, "
+        f"{results[FAILED]} failed."
+    )
+    return results
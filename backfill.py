@@ -0,0 +1,135 @@
+import calendar
+import json
+import re
+from datetime import date, timedelta
+
+from bs4 import BeautifulSoup
+
+from aggregates import FINISHED
+from archive import get_manifest
+from logger import logger
+from metadata import BASE_URL, metadata
+from utils import fetch_urls, find_valid_urls, get_client
+
+LIVESCORES_URL = (
+    "https://www.whoscored.com/livescores/data?d={day:%Y%m%d}&isSummary=true"
+)
+
+
+def season_months(league_name: str) -> list[tuple[int, int]]:
+    """The ``(year, month)`` pairs of the season a league name ends with.
+
+    "...-2024-2025" seasons run from July 2024 to June 2025, "...-2024" ones
+    through the calendar year. Names without a season use the current year.
+    """
+    if years := re.search(r"(\d{4})-(\d{4})$", league_name):
+        start = int(years.group(1))
+        return [(start, month) for month in range(7, 13)] + [
+            (start + 1, month) for month in range(1, 7)
+        ]
+
+    year = re.search(r"(\d{4})$", league_name)
+    year = int(year.group(1)) if year else date.today().year
+    return [(year, month) for month in range(1, 13)]
+
+
+def days_between(start: date, end: date) -> list[date]:
+    return [start + timedelta(days=days) for days in range((end - start).days + 1)]
+
+
+def recent_days(start: date = None, end: date = None) -> list[date]:
+    """The days of ``--fetch-recent``, yesterday and today by default.
+
+    Pages are stored under the month name of their day, so a range must not
+    cover the same month of two years.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=1)
+    if (end.year - start.year) * 12 + end.month - start.month >= 12:
+        raise ValueError("Recent matches can be fetched for up to 12 months.")
+    return days_between(start, end)
+
+
+def is_in_range(match: dict, start: date = None, end: date = None) -> bool:
+    """True when the match starts (in UTC) between ``start`` and ``end``."""
+    if not start and not end:
+        return True
+
+    day = date.fromisoformat(match["startTimeUtc"][:10])
+    return (not start or day >= start) and (not end or day <= end)
+
+
+def is_month_complete(league_name: str, year: int, month: int) -> bool:
+    """True when every match of a past month is finished and its page parsed."""
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+    if last_day >= date.today():
+        return False
+
+    directory = f"matches/{league_name}/{calendar.month_name[month]}"
+    try:
+        with open(f"{directory}/matches.json", "r", encoding="utf-8") as file:
+            tournaments = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+    matches = [match for tournament in tournaments for match in tournament["matches"]]
+    manifest = get_manifest(directory)
+    return bool(matches) and all(
+        match.get("status") == FINISHED and manifest.get(match["id"]).get("html")
+        for match in matches
+    )
+
+
+def discovery_months(
+    league_name: str, start: date = None, end: date = None
+) -> list[tuple[int, int]]:
+    """The months of a league whose matches have to be discovered.
+
+    These are the months of its season between ``start`` and ``end``, minus
+    the months already complete in the archive.
+    """
+    months = season_months(league_name)
+    if start:
+        months = [month for month in months if month >= (start.year, start.month)]
+    if end:
+        months = [month for month in months if month <= (end.year, end.month)]
+
+    pending = [month for month in months if not is_month_complete(league_name, *month)]
+    if len(pending) < len(months):
+        logger.info(
+            f"Skipping {len(months) - len(pending)} complete months of {league_name}"
+        )
+    return pending
+
+
+async def find_season_urls(league_urls: list[str], season: str) -> list[str]:
+    """Swaps every league URL for the URL of the same league in ``season``.
+
+    Seasons such as "2023/2024" (or "2023-2024") are looked up in the season
+    selector of the league page.
+    """
+    season = season.replace("-", "/")
+    responses = await fetch_urls(get_client(), league_urls)
+
+    season_urls = []
+    for response, url in zip(responses, league_urls):
+        if not response:
+            logger.error(f"Failed to fetch the seasons of {url}")
+            continue
+
+        soup = BeautifulSoup(response, "lxml")
+        option = next(
+            (
+                option
+                for option in soup.select("select#seasons option")
+                if option.get_text(strip=True) == season
+            ),
+            None,
+        )
+        if not option:
+            logger.error(f"No season {season} found for {url}, skipping it.")
+            continue
+        season_urls.append(f"{BASE_URL}{option['value']}")
+
+    await find_valid_urls(season_urls)
+    return [valid_url for url in season_urls if (valid_url := metadata.resolve(url))]
@@ -0,0 +1,98 @@
+"""Compares incident event bulk loads into SQLite with and without the tuning profile.
+
+python benchmark_sqlite.py --rows 200000
+"""
+
+import os
+import random
+import tempfile
+import time
+
+import click
+from sqlalchemy.orm import sessionmaker
+
+from database import create_db_engine, deferred_indexes
+from models import Base, IncidentEvent
+
+BATCH_SIZE = 1000
+
+
+def _events(rows: int) -> list[dict]:
+    return [
+        {
+            "id": event_id,
+            "match_id": event_id // 1600,
+            "event_id": event_id % 1600,
+            "minute": random.randint(0, 95),
+            "second": random.randint(0, 59),
+            "team_id": random.randint(1, 40),
+            "player_id": random.randint(1, 1000),
+            "x": random.uniform(0, 100),
+            "y": random.uniform(0, 100),
+            "period_value": random.choice((1, 2)),
+            "type_value": random.choice((1, 1, 1, 3, 4, 7, 10, 13, 16)),
+            "outcome_type_value": random.choice((0, 1)),
+            "qualifiers": [{"type": {"value": 56}, "value": "Back"}],
+            "satisfied_events_types": [90, 118, 123],
+            "is_touch": True,
+        }
+        for event_id in range(rows)
+    ]
+
+
+def _load(tuned: bool, events: list[dict], indexed: bool) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(
+            f"sqlite:///{os.path.join(directory, 'bench.db')}", tuned=tuned
+        )
+        Base.metadata.create_all(engine)
+        if indexed:
+            with engine.begin() as connection:
+                connection.exec_driver_sql(
+                    "CREATE INDEX ix_bench_match ON incident_event (match_id)"
+                )
+                connection.exec_driver_sql(
+                    "CREATE INDEX ix_bench_player ON incident_event (player_id)"
+                )
+
+        session = sessionmaker(bind=engine)()
+        started = time.perf_counter()
+        if tuned:
+            with deferred_indexes(session, IncidentEvent.__tablename__):
+                _insert(session, events)
+        else:
+            _insert(session, events)
+        elapsed = time.perf_counter() - started
+
+        session.close()
+        engine.dispose()
+        return elapsed
+
+
+def _insert(session, events: list[dict]) -> None:
+    # Same batching and insert call as populate.insert_incident_events.
+    for start in range(0, len(events), BATCH_SIZE):
+        session.bulk_insert_mappings(IncidentEvent, events[start : start + BATCH_SIZE])
+        session.commit()
+
+
+@click.command()
+@click.option("--rows", default=100_000, show_default=True)
+@click.option(
+    "--indexed/--no-indexed",
+    default=True,
+    show_default=True,
+    help="Add two secondary indexes to incident_event, as analytics setups do.",
+)
+def main(rows, indexed):
+    events = _events(rows)
+    results = {}
+    for name, tuned in (("default", False), ("tuned", True)):
+        elapsed = _load(tuned, events, indexed)
+        results[name] = rows / elapsed
+        click.echo(f"{name:>8}: {elapsed:7.2f}s {results[name]:>10,.0f} rows/s")
+    click.echo(f" speedup: {results['tuned'] / results['default']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,50 @@
+# Heavy subsystems (httpx, Playwright, SQLAlchemy, Alembic) are imported where
+# they are used, so short runs and --help only pay for what they need.
 import asyncio
-import json
+import contextlib
+import glob
 import os
 import random
-import sys
+import re
+from datetime import date
 
 import asyncclick as click
-import pydash
-from alembic import command
-from alembic.config import Config
-
-from constants import DATABASE_URI
-from crawler import (
-    get_matches_by_month_with_pw,
-    update_matches_by_recent_matches_with_pw,
-)
+
+from constants import DATABASE_URI, WATCH_INTERVAL
+from journal import FAILED, PARSED, TOURNAMENT, CrawlJournal
 from logger import logger
-from populate import populate_data
-from scraper import (
-    fetch_base_data,
-    get_matches_by_month,
-    update_matches_by_recent_matches,
-)
-from utils import find_valid_urls
+from metadata import metadata
+from writer import get_writer, shared_writer
 
 
 def find_possible_regions(search_term):
-    return pydash.filter_(REGIONS, lambda region: search_term.lower() in region.lower())
+    from search import REGION
+
+    return [
+        entry.name for entry in metadata.search_index.search(search_term, kind=REGION)
+    ]
+
+
+def find_league_urls(queries: list[str]) -> list[str]:
+    """Resolves every ``--league`` query to the URL of its best matching league."""
+    from search import TOURNAMENT
+
+    urls = []
+    for query in queries:
+        matches = metadata.search_index.search(query, kind=TOURNAMENT, limit=5)
+        if not matches:
+            raise click.BadParameter(f"No league found for {query!r}.")
+
+        best, others = matches[0], matches[1:]
+        click.echo(f"\033[92mSelected league: {best.region} {best.name}\033[0m")
+        if others:
+            click.echo(
+                "\033[93mAlso matched: "
+                + ", ".join(f"{entry.region} {entry.name}" for entry in others)
+                + "\033[0m"
+            )
+        urls.append(best.url)
+    return urls
 
 
 def display_regions(regions):
@@ -36,14 +55,48 @@ def display_regions(regions):
     click.echo()
 
 
-async def scrape_url(url: str, playwright: bool = False):
-    """Runs the scraping function asynchronously to fetch matches by month."""
+async def scrape_urls(
+    urls: list[str],
+    playwright: bool = False,
+    resume: bool = False,
+    hybrid: bool = False,
+    start: date = None,
+    end: date = None,
+):
+    """Scrapes every tournament URL while recording progress in the crawl journal.
+
+    All leagues are crawled together through one :class:`CrawlScheduler`.
+    With ``resume`` only the unfinished tournaments and matches of the previous
+    run are scraped, and failed URLs are retried while they have retry budget.
+    """
+    from scheduler import CrawlScheduler
+
+    journal = CrawlJournal()
+    try:
+        if resume:
+            requeued = journal.requeue_failed()
+            logger.info(f"Resuming crawl, {requeued} failed URLs re-queued.")
+        else:
+            journal.reset()
+
+        journal.add(urls, TOURNAMENT)
+        urls = journal.unfinished(urls)
 
-    click.echo("\033[93mFetching matches...\033[0m")
-    if playwright:
-        await get_matches_by_month_with_pw(url)
-    else:
-        await get_matches_by_month(url)
+        click.echo(f"\033[93mScraping matches of {len(urls)} leagues...\033[0m")
+        logger.info(f"Scraping data from {len(urls)} leagues")
+        await CrawlScheduler(playwright, journal, hybrid, start=start, end=end).run(
+            urls
+        )
+
+        for url in urls:
+            if journal.state(url) == FAILED:
+                continue
+            if journal.has_unfinished_children(url):
+                journal.mark(url, FAILED, "Some matches could not be scraped")
+            else:
+                journal.mark(url, PARSED)
+    finally:
+        journal.close()
 
     click.echo(
         "\033[92mFetching matches completed! You can find the matches in the matches folder.\033[0m"
@@ -53,7 +106,7 @@ async def scrape_url(url: str, playwright: bool = False):
 def find_tournament_url(all_leagues) -> list[str]:
     while True:
         # default to 5 random regions
-        selected_regions = random.sample(REGIONS, 5)
+        selected_regions = random.sample(metadata.region_names, 5)
 
         search_term = click.prompt(
             "\033[94mEnter country name to search or press Enter to select from the list\033[0m",
@@ -82,10 +135,9 @@ def find_tournament_url(all_leagues) -> list[str]:
             f"\033[92mSelected region: {selected_regions[region_choice - 1]}\033[0m\n"
         )
 
-        selected_region_data = pydash.find(
-            REGION_DATA,
-            lambda region: region["name"] == selected_regions[region_choice - 1],
-        )
+        selected_region_data = metadata.regions_by_name[
+            selected_regions[region_choice - 1]
+        ]
 
         if all_leagues:
             click.echo("\033[92mSelected all leagues.\033[0m")
@@ -115,17 +167,17 @@ def find_tournament_url(all_leagues) -> list[str]:
 
 
 def get_all_tournaments_urls():
-    urls = []
-    for region in REGION_DATA:
-        for league in region["tournaments"]:
-            urls.append(f"https://www.whoscored.com{league['url']}")
-    return urls
+    return list(metadata.tournament_urls)
 
 
 def get_urls(tournament_urls):
-    with open("matches/tournament_url_mapping.json", "r", encoding="utf-8") as f:
-        tournament_url_mapping = json.load(f)
-    urls = [tournament_url_mapping[url] for url in tournament_urls]
+    urls = []
+    for url in tournament_urls:
+        valid_url = metadata.resolve(url)
+        if not valid_url:
+            logger.error(f"No valid URL found for {url}, skipping it.")
+            continue
+        urls.append(valid_url)
     return urls
 
 
@@ -142,12 +194,30 @@ def get_urls(tournament_urls):
     is_flag=True,
     help="Select all leagues.",
 )
+@click.option(
+    "--league",
+    "-l",
+    multiple=True,
+    help='Select the league best matching a query such as "england premier", '
+    "without prompting. Can be repeated.",
+)
 @click.option(
     "--playwright",
     "-pw",
     is_flag=True,
     help="Use Playwright for scraping.",
 )
+@click.option(
+    "--hybrid",
+    "-hy",
+    is_flag=True,
+    help="Use httpx and fall back to Playwright only for blocked pages.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue the unfinished work of the previous scrape.",
+)
 @click.option(
     "--populate",
     "-p",
@@ -172,46 +242,255 @@ def get_urls(tournament_urls):
     is_flag=True,
     help="Fetch today's matches.",
 )
-async def cli(fetch_all, all_leagues, playwright, populate, scrape, run, fetch_recent):
+@click.option(
+    "--watch",
+    "-w",
+    is_flag=True,
+    help="Keep polling livescores and refresh the matches that changed.",
+)
+@click.option(
+    "--interval",
+    default=WATCH_INTERVAL,
+    show_default=True,
+    help="Seconds between two livescore polls in watch mode.",
+)
+@click.option(
+    "--enqueue",
+    is_flag=True,
+    help="Put the match URLs of the selected leagues into the shared job queue.",
+)
+@click.option(
+    "--worker",
+    is_flag=True,
+    help="Fetch and parse match URLs from the shared job queue.",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="With --run or --fetch-recent, write scraped data to the database while "
+    "scraping instead of populating it afterwards.",
+)
+@click.option(
+    "--skip-json",
+    is_flag=True,
+    help="With --stream, don't write the matches and match centre JSON files. "
+    "Raw pages are still saved.",
+)
+@click.option(
+    "--reparse",
+    is_flag=True,
+    help="Extract the match data of the stored raw HTML pages again, offline.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="With --reparse, also parse the pages that did not change.",
+)
+@click.option(
+    "--season",
+    help='Scrape the selected leagues in another season, such as "2023/2024".',
+)
+@click.option(
+    "--from",
+    "date_from",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Only discover matches from this day on (YYYY-MM-DD). With "
+    "--fetch-recent, the first day to fetch.",
+)
+@click.option(
+    "--to",
+    "date_to",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Only discover matches up to this day (YYYY-MM-DD). With "
+    "--fetch-recent, the last day to fetch.",
+)
+@click.option(
+    "--rebuild-stats",
+    is_flag=True,
+    help="Recompute match_team_stats and team_season_stats of every match.",
+)
+@click.option(
+    "--partition-events",
+    is_flag=True,
+    help="Partition incident_event by season (PostgreSQL only).",
+)
+@click.pass_context
+async def cli(
+    ctx,
+    fetch_all,
+    all_leagues,
+    league,
+    playwright,
+    hybrid,
+    resume,
+    populate,
+    scrape,
+    run,
+    fetch_recent,
+    watch,
+    interval,
+    enqueue,
+    worker,
+    stream,
+    skip_json,
+    reparse,
+    force,
+    season,
+    date_from,
+    date_to,
+    rebuild_stats,
+    partition_events,
+):
+    start = date_from.date() if date_from else None
+    end = date_to.date() if date_to else None
+    if start and end and start > end:
+        raise click.BadParameter("--from must not be after --to.")
+
+    if (
+        populate
+        or fetch_recent
+        or watch
+        or worker
+        or enqueue
+        or run
+        or rebuild_stats
+        or partition_events
+    ):
+        init_db()
+
+    if reparse:
+        from archive import SKIPPED, reparse_archive
+
+        results = reparse_archive(force)
+        click.echo(
+            f"\033[92m{results[PARSED]} pages re-parsed, {results[SKIPPED]} unchanged, "
+            f"{results[FAILED]} failed.\033[0m"
+        )
+        return
+
+    if rebuild_stats:
+        from aggregates import rebuild_stats as rebuild
+
+        rebuild()
+        click.echo("\033[92mStats have been rebuilt!\033[0m")
+        return
+
+    if partition_events:
+        from partitions import partition_incident_events
+
+        partition_incident_events()
+        click.echo("\033[92mIncident events are partitioned by season!\033[0m")
+        return
+
     if populate:
-        populate_data()
+        from populate import populate_data
+
+        populate_data(defer_indexes=True)
         click.echo("\033[92mDatabase populated successfully!\033[0m")
         return
 
+    from utils import find_valid_urls, shared_client
+
+    # One HTTP client and one file writer for every phase of the run, closed
+    # (and flushed) when the command exits.
+    await ctx.with_async_resource(shared_client())
+    await ctx.with_async_resource(shared_writer())
+
+    if worker:
+        from job_queue import run_worker
+
+        await run_worker(playwright, hybrid)
+        click.echo("\033[92mJob queue is drained!\033[0m")
+        return
+
+    ensure_base_data(playwright)
+
     if fetch_recent:
+        from backfill import recent_days
+
+        try:
+            recent_days(start, end)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+
         logger.info("Fetching recent matches...")
-        if playwright:
-            await update_matches_by_recent_matches_with_pw()
-        else:
-            await update_matches_by_recent_matches()
-        populate_data()
+        async with database_pipeline(stream, skip_json):
+            if playwright:
+                from crawler import update_matches_by_recent_matches_with_pw
+
+                await update_matches_by_recent_matches_with_pw(start, end)
+            else:
+                from scraper import update_matches_by_recent_matches
+
+                await update_matches_by_recent_matches(start, end)
         click.echo(
             "\033[92mRecent matches fetched and database populated successfully!\033[0m"
         )
         return
 
-    base_urls = (
-        get_all_tournaments_urls() if fetch_all else find_tournament_url(all_leagues)
-    )
+    if watch:
+        from watcher import LivescoreWatcher
+
+        logger.info("Watching livescores...")
+        click.echo(f"\033[93mWatching livescores every {interval} seconds...\033[0m")
+        await LivescoreWatcher(interval).run()
+        return
+
+    if fetch_all:
+        base_urls = get_all_tournaments_urls()
+    elif league:
+        base_urls = find_league_urls(league)
+    else:
+        base_urls = find_tournament_url(all_leagues)
 
     await find_valid_urls(base_urls)
     urls = get_urls(base_urls)
-
-    if scrape:
-        for url in urls:
-            click.echo(f"\033[93mScraping data from {url}...\033[0m")
-            logger.info(f"Scraping data from {url}")
-            await scrape_url(url, playwright)
+    if season:
+        from backfill import find_season_urls
+
+        urls = await find_season_urls(urls, season)
+
+    if enqueue:
+        from job_queue import enqueue_leagues
+        from populate import load_data
+
+        added = await enqueue_leagues(urls, start, end)
+        # load_data reads the matches.json files queued in the writer.
+        await get_writer().flush()
+        load_data()
+        click.echo(f"\033[92m{added} match URLs queued for the workers.\033[0m")
+    elif scrape:
+        await scrape_urls(urls, playwright, resume, hybrid, start, end)
     elif run:
-        for url in urls:
-            click.echo(f"\033[93mScraping data from {url}...\033[0m")
-            logger.info(f"Scraping data from {url}")
-            await scrape_url(url, playwright)
-        populate_data()
+        async with database_pipeline(stream, skip_json):
+            await scrape_urls(urls, playwright, resume, hybrid, start, end)
     else:
         click.echo("\033[91mPlease select an option.\033[0m")
 
 
+def database_pipeline(stream: bool, skip_json: bool):
+    """Streams the scraped data into the database with ``--stream``.
+
+    Otherwise, what the scrape changed is populated once it is done.
+    """
+    from pipeline import collecting, streaming
+
+    if not stream:
+        return collecting()
+    return streaming(write_files=not skip_json)
+
+
+def ensure_base_data(playwright: bool = False) -> None:
+    if os.path.exists("matches/all_regions.json"):
+        return
+
+    from scraper import fetch_base_data
+
+    click.echo("\033[93mBase data not found. Fetching base data...\033[0m")
+    fetch_base_data(playwright)
+    click.echo("\033[92mBase data fetched successfully!\033[0m")
+
+
 def database_exists():
     if DATABASE_URI.startswith("sqlite:///"):
         # For SQLite, check if the database file exists
@@ -229,13 +508,61 @@ def database_exists():
             return False
 
 
+def head_revisions() -> set[str]:
+    """Reads the head revisions from the migration scripts without loading Alembic."""
+    revisions, down_revisions = set(), set()
+    for path in glob.glob(os.path.join("migrations", "versions", "*.py")):
+        with open(path, encoding="utf-8") as file:
+            source = file.read()
+        if revision := re.search(r"^revision\b.*?=\s*['\"](\w+)['\"]", source, re.M):
+            revisions.add(revision.group(1))
+        if down := re.search(r"^down_revision\b.*?=\s*(.+)$", source, re.M):
+            down_revisions.update(re.findall(r"['\"](\w+)['\"]", down.group(1)))
+    return revisions - down_revisions
+
+
+def current_revisions() -> set[str]:
+    """Returns the revisions stamped in ``alembic_version``, empty for a new database."""
+    if DATABASE_URI.startswith("sqlite:///"):
+        import sqlite3
+
+        db_path = DATABASE_URI.replace("sqlite:///", "")
+        if not os.path.exists(db_path):
+            return set()
+        with contextlib.closing(sqlite3.connect(db_path)) as connection:
+            try:
+                rows = connection.execute("SELECT version_num FROM alembic_version")
+                return {row[0] for row in rows}
+            except sqlite3.OperationalError:
+                return set()
+
+    from sqlalchemy import text
+    from sqlalchemy.exc import SQLAlchemyError
+
+    from database import engine
+
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(text("SELECT version_num FROM alembic_version"))
+            return {row[0] for row in rows}
+    except SQLAlchemyError:
+        return set()
+
+
 def apply_migrations():
+    from alembic import command
+    from alembic.config import Config
+
     alembic_cfg = Config("alembic.ini")
     command.upgrade(alembic_cfg, "head")
 
 
 def init_db():
     """Initialize the database and apply migrations if needed."""
+    if current_revisions() == head_revisions():
+        logger.info("Database is already at the latest revision.")
+        return
+
     if database_exists():
         logger.info("Database already exists. Applying migrations...")
     else:
@@ -251,17 +578,4 @@ if __name__ == "__main__":
     if not os.path.exists("matches"):
         os.makedirs("matches")
 
-    pw = "--playwright" in sys.argv or "-pw" in sys.argv
-    if not os.path.exists("matches/all_regions.json"):
-        click.echo("\033[93mBase data not found. Fetching base data...\033[0m")
-        fetch_base_data(pw)
-        click.echo("\033[92mBase data fetched successfully!\033[0m")
-
-    with open("matches/all_regions.json", "r", encoding="utf-8") as file:
-        REGION_DATA = json.load(file)
-
-    REGIONS = [region["name"] for region in REGION_DATA]
-
-    init_db()
-
     asyncio.run(cli())
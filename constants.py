@@ -3,4 +3,67 @@ import os
 DATABASE_URI = os.getenv("DATABASE_URI") or "sqlite:///matches.db"
 
 CONCURRENCY_LIMIT = 5
+# Month and day endpoints of a backfill are fetched this many at a time.
+BACKFILL_WINDOW = int(os.getenv("BACKFILL_WINDOW") or 6)
 RETRY_LIMIT = 8
+
+JOURNAL_PATH = "matches/crawl_journal.db"
+JOURNAL_RETRY_BUDGET = 3
+
+CRAWL_WORKERS = 20
+HOST_CONCURRENCY_LIMIT = 10
+
+JOB_BATCH_SIZE = 20
+JOB_LEASE_SECONDS = 600
+JOB_MAX_ATTEMPTS = 3
+JOB_POLL_INTERVAL = 5
+
+WATCH_INTERVAL = 30
+
+# Settings of the HTTP client shared by every phase of a run.
+HTTP2 = os.getenv("HTTP2", "").lower() in ("1", "true", "yes")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS") or 20)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS") or 10)
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY") or 60)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT") or 30)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT") or 10)
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL") or 300)
+
+# A host is sent straight to Playwright after this many blocked responses in a row,
+# until the cooldown has passed and httpx is tried again.
+ESCALATION_THRESHOLD = 3
+ESCALATION_COOLDOWN = 300
+
+# Lifetime of harvested browser cookies that have no expiry of their own.
+SESSION_COOKIE_TTL = 1800
+
+# Canonical tournament URLs change with every new season, so resolutions expire.
+URL_MAPPING_TTL = 7 * 24 * 60 * 60
+
+# Raw pages are written from a thread pool. Producers wait once WRITER_QUEUE_SIZE
+# files are pending, and WRITER_FSYNC makes every batch durable before moving on.
+WRITER_THREADS = int(os.getenv("WRITER_THREADS") or 4)
+WRITER_QUEUE_SIZE = int(os.getenv("WRITER_QUEUE_SIZE") or 100)
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE") or 16)
+WRITER_FSYNC = os.getenv("WRITER_FSYNC", "").lower() in ("1", "true", "yes")
+
+# With --stream, scraped items are inserted in batches of PIPELINE_BATCH_SIZE and
+# scrapers wait once PIPELINE_QUEUE_SIZE items are pending.
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE") or 50)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE") or 200)
+
+EVENT_STORE_PATH = "matches/event_store"
+
+# Processes used by --reparse, one month directory at a time.
+REPARSE_WORKERS = int(os.getenv("REPARSE_WORKERS") or os.cpu_count() or 1)
+
+# Applied to every SQLite connection unless SQLITE_TUNING is false. WAL with
+# synchronous=NORMAL stays consistent after a crash, the last commits may be lost.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() in ("1", "true", "yes")
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
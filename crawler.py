@@ -1,19 +1,23 @@
 import asyncio
 import calendar
-import json
+import contextlib
 import os
 import time
 from collections import defaultdict
+from datetime import date
 
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 from tqdm.asyncio import tqdm
 
+from archive import save_manifests, store_page
+from backfill import LIVESCORES_URL, recent_days
 from constants import CONCURRENCY_LIMIT, RETRY_LIMIT
 from logger import logger
-from parsers import parse_base_url, parse_match_html
-from scraper import find_matches_url_by_tournaments
-from utils import HEADERS, write_file
+from pipeline import publish_tournaments, write_json_files
+from metadata import metadata
+from utils import HEADERS, SingleFlight, write_file
+from writer import write_file_async
 
 
 def fetch_page_content_sync(
@@ -79,9 +83,9 @@ async def fetch_page_content(
 
             if not save_file:
                 return content
-            write_file(save_path, content)
+            await write_file_async(save_path, content)
             logger.info(f"Successfully fetched content from {url}")
-            return  # Exit on successful fetch
+            return content  # Exit on successful fetch
         except Exception as e:
             logger.error(
                 f"Attempt {attempt + 1} to fetch content from {url} failed: {e}"
@@ -92,185 +96,184 @@ async def fetch_page_content(
                 )
             await asyncio.sleep(1)
 
-async def get_tournaments_by_month_by_pw(base_data_url: str) -> dict[str, list[dict]]:
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)  # Limit concurrent tasks
 
-        responses = []
-        async with semaphore:
-            for month in range(1, 13):
-                page = await browser.new_page()
-                await page.set_extra_http_headers(HEADERS)
-                content = await fetch_page_content(
-                    page, base_data_url.format(month=month), None, save_file=False
-                )
-                responses.append(content)
-                await page.close()
+class BrowserPool:
+    """A single Chromium instance shared by a bounded number of concurrent pages.
 
-        await browser.close()
+    Launching a browser is the most expensive part of a Playwright crawl, so a
+    whole run should go through one pool instead of launching per league. All
+    pages share one browser context, so cookies (e.g. clearance cookies) are
+    kept between pages and can be exported with :meth:`cookies`.
+    """
 
-    tournaments_by_month = defaultdict(list)
-    for response, month in zip(responses, range(1, 13)):
-        try:
-            response = response.replace("</body></html>", "").replace(
-                "<html><head></head><body>", ""
-            )
-            tournament_data = json.loads(response)
-            tournaments = tournament_data.get("tournaments", [])
-            if not tournaments:
-                continue
+    def __init__(self, size: int = CONCURRENCY_LIMIT):
+        self.semaphore = asyncio.Semaphore(size)
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self._fetches = SingleFlight()
+
+    async def start(self) -> "BrowserPool":
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch()
+        self.context = await self.browser.new_context(
+            user_agent=HEADERS["User-Agent"], extra_http_headers=HEADERS
+        )
+        return self
 
-            tournaments_by_month[calendar.month_name[month]].extend(tournaments)
-        except json.JSONDecodeError:
-            continue
+    async def fetch_json(self, url: str) -> dict | None:
+        return await self._fetches.do(("json", url), self._fetch_json, url)
 
-    return tournaments_by_month
+    async def _fetch_json(self, url: str) -> dict | None:
+        async with self.semaphore:
+            return await fetch_json(self.context.request, url)
 
+    async def cookies(self, url: str) -> list[dict]:
+        return await self.context.cookies(url)
 
-async def get_matches_by_month_with_pw(base_url: str) -> None:
-    base_match_url, base_data_url, league_name = parse_base_url(base_url)
+    async def close(self) -> None:
+        await self.browser.close()
+        await self._playwright.stop()
 
-    tournaments = await get_tournaments_by_month_by_pw(base_data_url)
-    match_urls = find_matches_url_by_tournaments(
-        tournaments,
-        base_match_url,
-        league_name,
-    )
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)  # Limit concurrent tasks
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
-        async def scrape_url(url: str, path: str, tqdm_bar) -> None:
-            async with semaphore:
-                page = await browser.new_page()
-                await page.set_extra_http_headers(HEADERS)
-                await fetch_page_content(page, url, path)
+    async def fetch(
+        self, url: str, save_path: str = None, save_file: bool = False
+    ) -> str | None:
+        """Renders ``url``, sharing the page with concurrent fetches of it."""
+        return await self._fetches.do(
+            (url, save_path, save_file), self._fetch, url, save_path, save_file
+        )
+
+    async def _fetch(
+        self, url: str, save_path: str = None, save_file: bool = False
+    ) -> str | None:
+        async with self.semaphore:
+            page = await self.context.new_page()
+            try:
+                return await fetch_page_content(page, url, save_path, save_file)
+            finally:
                 await page.close()
-                tqdm_bar.update(1)
 
-        file_paths = []
-        tasks = []
-        # Initialize tqdm progress bar
-        with tqdm(
-            total=len(match_urls),
-            desc="Scraping Matches",
-            unit="url",
-        ) as progress_bar:
-            for match_url in match_urls:
-                month = match_url.split("x-month=")[1]
-                match_id = match_url.split("/")[4]
 
-                save_path = f"matches/{league_name}/{month}/raw_html_{match_id}.html"
-                file_paths.append(save_path)
-                tasks.append(scrape_url(match_url, save_path, progress_bar))
+async def fetch_json(request_context, url: str) -> dict | None:
+    """
+    Fetches a JSON endpoint through a Playwright ``APIRequestContext``.
 
-            await asyncio.gather(*tasks)
-        await browser.close()
+    The request shares the cookies of its browser context, but no page is
+    rendered and the body does not have to be unwrapped from a DOM.
+
+    Args:
+        request_context (APIRequestContext): The request context, e.g. ``context.request``.
+        url (str): The URL of the JSON endpoint.
+    """
+    for attempt in range(RETRY_LIMIT):
+        try:
+            response = await request_context.get(url)
+            if not response.ok:
+                raise Exception(f"Status code {response.status}")
+
+            return await response.json()
+        except Exception as e:
+            logger.error(f"Attempt {attempt + 1} to fetch JSON from {url} failed: {e}")
+            if attempt + 1 == RETRY_LIMIT:
+                logger.error(
+                    f"Failed to fetch JSON from {url} after {RETRY_LIMIT} attempts"
+                )
+            await asyncio.sleep(1)
+
+
+async def get_tournaments_by_month_by_pw(
+    base_data_url: str,
+    months: list[tuple[int, int]],
+    pool: BrowserPool = None,
+    limit: asyncio.Semaphore = None,
+) -> dict[str, list[dict]]:
+    """Playwright counterpart of ``scraper.get_tournaments_by_month``."""
+    if pool is None:
+        async with BrowserPool() as pool:
+            return await get_tournaments_by_month_by_pw(
+                base_data_url, months, pool, limit
+            )
 
-    for file_path in tqdm(file_paths, desc="Parsing playwright data"):
-        with open(file_path, "r", encoding="utf-8") as file:
-            content = file.read()
-            month = file_path.split("/")[2]
-            parse_match_html(content, month, league_name)
+    async def fetch(year: int, month: int) -> dict | None:
+        async with limit or contextlib.nullcontext():
+            return await pool.fetch_json(base_data_url.format(year=year, month=month))
+
+    responses = await asyncio.gather(*(fetch(year, month) for year, month in months))
+
+    tournaments_by_month = defaultdict(list)
+    for tournament_data, (_, month) in zip(responses, months):
+        if not tournament_data:
+            continue
+
+        tournaments = tournament_data.get("tournaments", [])
+        if not tournaments:
+            continue
+
+        tournaments_by_month[calendar.month_name[month]].extend(tournaments)
+
+    return tournaments_by_month
 
 
 async def find_valid_urls_with_pw(tournament_urls: list[str]) -> None:
     """We have a list of URLs that has not season id and stage id.
 
     We need to find full URLs that contain season id and stage id.
+    Resolutions are memoized by the metadata service, so only unknown or
+    expired URLs are fetched.
     """
     logger.info("Finding valid URLs...")
-    tournament_url_mapping = {}
-
-    if os.path.exists("matches/tournament_url_mapping.json"):
-        with open("matches/tournament_url_mapping.json", "r", encoding="utf-8") as f:
-            existing_tournament_url_mapping = json.load(f)
-            existing_tournament_url_mapping.update(tournament_url_mapping)
-            tournament_url_mapping = existing_tournament_url_mapping
-
-    tournament_urls = tuple(
-        filter(lambda url: url not in tournament_url_mapping, tournament_urls)
-    )
+    tournament_urls = metadata.unresolved(tournament_urls)
     if not tournament_urls:
         return
 
-    responses = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
-        async with semaphore:
-            for url in tqdm(tournament_urls, desc="Finding valid URLs"):
-                page = await browser.new_page()
-                await page.set_extra_http_headers(HEADERS)
-                response = await fetch_page_content(page, url, None, save_file=False)
-                responses.append(response)
-                await page.close()
-
-        for response, url in tqdm(
-            zip(responses, tournament_urls),
+    async with BrowserPool() as pool:
+        responses = await tqdm.gather(
+            *(pool.fetch(url) for url in tournament_urls),
             desc="Finding valid URLs",
-        ):
-            if not response:
-                continue
-
-            soup = BeautifulSoup(response, "lxml")
-            canonical_link = soup.find("link", {"rel": "canonical"})
-            if not canonical_link:
-                logger.error("No valid link found for %s", url)
-                continue
-
-            valid_url = canonical_link["href"]
-            tournament_url_mapping[url] = valid_url
-
-        write_file(
-            "matches/tournament_url_mapping.json", tournament_url_mapping, is_json=True
         )
 
-    await browser.close()
+    for response, url in zip(responses, tournament_urls):
+        if not response:
+            continue
 
+        soup = BeautifulSoup(response, "lxml")
+        canonical_link = soup.find("link", {"rel": "canonical"})
+        if not canonical_link:
+            logger.error("No valid link found for %s", url)
+            continue
 
-async def update_matches_by_recent_matches_with_pw() -> None:
-    now = time.localtime()
-    month = now.tm_mon
-    month_name = calendar.month_name[month]
-    day = now.tm_mday
+        metadata.set_url(url, canonical_link["href"])
 
-    today_url = f"https://www.whoscored.com/livescores/data?d=2024{month:02d}{day:02d}&isSummary=true"
-    yesterday_url = f"https://www.whoscored.com/livescores/data?d=2024{month:02d}{day - 1:02d}&isSummary=true"
 
-    responses = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        for url in [today_url, yesterday_url]:
-            page = await browser.new_page()
-            await page.set_extra_http_headers(HEADERS)
-            content = await fetch_page_content(page, url, None, save_file=False)
-            content = content.replace("</body></html>", "").replace(
-                "<html><head></head><body>", ""
-            )
-            responses.append(json.loads(content))
-            await page.close()
-        await browser.close()
+async def update_matches_by_recent_matches_with_pw(
+    start: date = None, end: date = None
+) -> None:
+    """Playwright counterpart of ``scraper.update_matches_by_recent_matches``."""
+    days = recent_days(start, end)
 
-    with open("matches/all_regions.json", "r", encoding="utf-8") as file:
-        region_data = json.load(file)
+    async with BrowserPool() as pool:
+        responses = await asyncio.gather(
+            *(pool.fetch_json(LIVESCORES_URL.format(day=day)) for day in days)
+        )
 
-    tournament_name_league_mapping = {}
-    for region in region_data:
-        for league in region["tournaments"]:
-            key = f"{region['id']}_{league['id']}"
-            tournament_name_league_mapping[key] = (
-                "https://www.whoscored.com" + league["url"]
-            )
+    tournament_name_league_mapping = metadata.tournament_league_mapping
 
     tournaments = []
     base_tournament_urls = []
-    for response, day in zip(responses, [day, day - 1]):
+    for response, day in zip(responses, days):
+        if not response:
+            logger.error(f"No livescores found for {day}")
+            continue
+
         for tournament in response["tournaments"]:
-            tournament["x-day"] = day
-            tournaments.append(tournament)
+            tournament["x-day"] = day.day
+            tournaments.append((day, tournament))
             base_tournament_urls.append(
                 tournament_name_league_mapping[
                     f"{tournament['regionId']}_{tournament['tournamentId']}"
@@ -279,72 +282,74 @@ async def update_matches_by_recent_matches_with_pw() -> None:
 
     await find_valid_urls_with_pw(base_tournament_urls)
 
-    with open("matches/tournament_url_mapping.json", "r", encoding="utf-8") as f:
-        tournament_url_mapping = json.load(f)
     match_url_by_league = defaultdict(list)
+    seen = set()
 
-    for tournament in tournaments:
-        league_name = tournament_url_mapping[
+    for day, tournament in tournaments:
+        valid_url = metadata.resolve(
             tournament_name_league_mapping[
                 f"{tournament['regionId']}_{tournament['tournamentId']}"
             ]
-        ].split("/")[-1]
-        os.makedirs(f"matches/{league_name}/{month_name}", exist_ok=True)
-        match_day = tournament["x-day"]
-        write_file(
-            f"matches/{league_name}/{month_name}/matches_{match_day:02d}.json",
-            [tournament],
-            is_json=True,
         )
+        if not valid_url:
+            continue
+
+        league_name = valid_url.split("/")[-1]
+        month_name = calendar.month_name[day.month]
+        os.makedirs(f"matches/{league_name}/{month_name}", exist_ok=True)
+        if write_json_files():
+            await write_file_async(
+                f"matches/{league_name}/{month_name}/matches_{day.day:02d}.json",
+                [tournament],
+                is_json=True,
+            )
+        await publish_tournaments([tournament])
 
         base_url = f"https://www.whoscored.com/Matches/{{match_id}}/Live/{league_name}-{{home_team}}-{{away_team}}"
         for match in tournament["matches"]:
+            if match["id"] in seen:
+                continue
+            seen.add(match["id"])
+
             home_team = match["homeTeamName"].replace(" ", "-").replace(".", "")
             away_team = match["awayTeamName"].replace(" ", "-").replace(".", "")
             match_url = base_url.format(
                 match_id=match["id"], home_team=home_team, away_team=away_team
             )
 
-            match_url_by_league[league_name].append(match_url)
+            match_url_by_league[league_name].append((month_name, match_url))
 
     async with async_playwright() as p:
         browser = await p.chromium.launch()
         semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
 
-        async def scrape_and_save_content(url: str, path: str, tqdm_bar) -> None:
+        async def scrape_and_store(
+            league_name: str, month_name: str, url: str, tqdm_bar
+        ) -> None:
             async with semaphore:
                 page = await browser.new_page()
                 await page.set_extra_http_headers(HEADERS)
-                page_content = await fetch_page_content(page, url, path)
-                if page_content:
-                    write_file(save_path, page_content)
+                content = await fetch_page_content(page, url, save_file=False)
                 await page.close()
-                tqdm_bar.update(1)
+            tqdm_bar.update(1)
+            if not content:
+                logger.error(f"Failed to fetch {url}")
+                return
+
+            await store_page(content, league_name, month_name, url.split("/")[4])
 
-        tasks = []
         with tqdm(
-            total=len(match_url_by_league.values()),
+            total=sum(len(urls) for urls in match_url_by_league.values()),
             desc="Scraping Matches",
             unit="url",
         ) as progress_bar:
-            for league_name, urls in match_url_by_league.items():
-                for url in urls:
-                    match_id = url.split("/")[4]
-                    save_path = (
-                        f"matches/{league_name}/{month_name}/raw_html_{match_id}.html"
-                    )
-                    tasks.append(scrape_and_save_content(url, save_path, progress_bar))
-
-            await asyncio.gather(*tasks)
+            await asyncio.gather(
+                *(
+                    scrape_and_store(league_name, month_name, url, progress_bar)
+                    for league_name, urls in match_url_by_league.items()
+                    for month_name, url in urls
+                )
+            )
         await browser.close()
 
-    for league_name, urls in tqdm(
-        match_url_by_league.items(),
-        desc="Fetching matches...",
-    ):
-        for url in urls:
-            match_id = url.split("/")[4]
-            file_path = f"matches/{league_name}/{month_name}/raw_html_{match_id}.html"
-            with open(file_path, "r", encoding="utf-8") as file:
-                content = file.read()
-                parse_match_html(content, month_name, league_name)
+    save_manifests()
@@ -1,7 +1,58 @@
-from sqlalchemy import create_engine
+import contextlib
+
+from sqlalchemy import bindparam, create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
-from constants import DATABASE_URI
+from constants import DATABASE_URI, SQLITE_PRAGMAS, SQLITE_TUNING
+
+
+def _apply_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+
+def create_db_engine(uri: str = DATABASE_URI, tuned: bool = SQLITE_TUNING):
+    """Creates an engine, applying ``SQLITE_PRAGMAS`` to every SQLite connection."""
+    engine = create_engine(uri)
+    if tuned and engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
 
-engine = create_engine(DATABASE_URI)
+engine = create_db_engine()
 SessionLocal = sessionmaker(bind=engine)
+
+
+@contextlib.contextmanager
+def deferred_indexes(session, *tables: str):
+    """Drops the secondary indexes of ``tables`` during a bulk load on SQLite.
+
+    Building an index once after the load is much cheaper than updating it on
+    every insert. The indexes are recreated even if the load fails.
+    """
+    bind = session.get_bind()
+    if bind.dialect.name != "sqlite":
+        yield
+        return
+
+    indexes = session.execute(
+        text(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND sql IS NOT NULL AND tbl_name IN :tables"
+        ).bindparams(bindparam("tables", expanding=True)),
+        {"tables": list(tables)},
+    ).all()
+    for name, _ in indexes:
+        session.execute(text(f'DROP INDEX "{name}"'))
+    session.commit()
+
+    try:
+        yield
+    finally:
+        session.rollback()
+        for _, sql in indexes:
+            session.execute(text(sql))
+        session.execute(text("PRAGMA optimize"))
+        session.commit()
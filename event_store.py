@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from constants import EVENT_STORE_PATH
+from events import EVENT_DTYPE, load_match_events
+from logger import logger
+from utils import find_incident_event_files
+
+INDEX_DTYPE = np.dtype([("match_id", "<i8"), ("offset", "<i8"), ("count", "<i8")])
+
+
+def _column_dtype(field: str) -> np.dtype:
+    # Columns are stored little-endian whatever the machine writing them.
+    return EVENT_DTYPE[field].newbyteorder("<")
+
+
+def build_event_store(json_files: list[str] = None, path: str = EVENT_STORE_PATH):
+    """Writes the incident events of every match into a column-oriented store.
+
+    Every ``EVENT_DTYPE`` field becomes one file of fixed-width values, with
+    the events of a match stored contiguously and matches sorted by id.
+    ``index.bin`` maps every match id to its offset and number of events. The
+    store is built next to ``path`` and swapped in once complete.
+    """
+    if json_files is None:
+        json_files = find_incident_event_files()
+
+    matches = {}
+    for json_file in json_files:
+        match_id = int(json_file.split("_")[-1].split(".")[0])
+        matches[match_id] = json_file
+
+    build_path = f"{path}.building"
+    shutil.rmtree(build_path, ignore_errors=True)
+    os.makedirs(build_path)
+
+    columns = {
+        field: open(os.path.join(build_path, f"{field}.bin"), "wb")
+        for field in EVENT_DTYPE.names
+    }
+    index = []
+    offset = 0
+    try:
+        for match_id in sorted(matches):
+            try:
+                events = load_match_events(matches[match_id])
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load events of {matches[match_id]}: {e}")
+                continue
+
+            for field, file in columns.items():
+                file.write(events[field].astype(_column_dtype(field)).tobytes())
+            index.append((match_id, offset, len(events)))
+            offset += len(events)
+    finally:
+        for file in columns.values():
+            file.close()
+
+    np.array(index, dtype=INDEX_DTYPE).tofile(os.path.join(build_path, "index.bin"))
+    with open(os.path.join(build_path, "meta.json"), "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "count": offset,
+                "columns": {
+                    field: _column_dtype(field).str for field in EVENT_DTYPE.names
+                },
+            },
+            file,
+            indent=4,
+        )
+
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(build_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    logger.info(f"Event store built with {offset} events of {len(index)} matches.")
+
+
+class EventStore:
+    """Read-only, memory-mapped view of a store written by :func:`build_event_store`.
+
+    Columns are mapped on first use. Per-match slices are views into the
+    mapping, so nothing is read from disk until the values are touched.
+    """
+
+    def __init__(self, path: str = EVENT_STORE_PATH):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        self.count = meta["count"]
+        self.dtypes = {
+            field: np.dtype(dtype) for field, dtype in meta["columns"].items()
+        }
+        self.index = np.fromfile(os.path.join(path, "index.bin"), dtype=INDEX_DTYPE)
+        self._columns: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def match_ids(self) -> np.ndarray:
+        return self.index["match_id"]
+
+    def column(self, field: str) -> np.ndarray:
+        """The ``field`` values of every event in the store, memory-mapped."""
+        if field not in self._columns:
+            if not self.count:
+                self._columns[field] = np.empty(0, dtype=self.dtypes[field])
+            else:
+                self._columns[field] = np.memmap(
+                    os.path.join(self.path, f"{field}.bin"),
+                    dtype=self.dtypes[field],
+                    mode="r",
+                    shape=(self.count,),
+                )
+        return self._columns[field]
+
+    def _span(self, match_id: int) -> slice:
+        position = np.searchsorted(self.index["match_id"], match_id)
+        if position == len(self.index) or self.index["match_id"][position] != match_id:
+            raise KeyError(match_id)
+        offset, count = self.index[position][["offset", "count"]]
+        return slice(int(offset), int(offset + count))
+
+    def match(self, match_id: int, fields: list[str] = None) -> dict[str, np.ndarray]:
+        """Zero-copy views of the columns of one match."""
+        span = self._span(match_id)
+        return {field: self.column(field)[span] for field in fields or self.dtypes}
+
+    def where(self, mask: np.ndarray, fields: list[str] = None) -> np.ndarray:
+        """Gathers the events selected by ``mask`` into an ``EVENT_DTYPE`` array."""
+        positions = np.flatnonzero(mask)
+        fields = fields or list(self.dtypes)
+        events = np.empty(
+            len(positions), dtype=[(field, EVENT_DTYPE[field]) for field in fields]
+        )
+        for field in fields:
+            events[field] = self.column(field)[positions]
+        return events
+
+    def team(self, team_id: int, fields: list[str] = None) -> np.ndarray:
+        """Events of one team across the whole archive."""
+        return self.where(self.column("team_id") == team_id, fields)
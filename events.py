@@ -0,0 +1,214 @@
+import json
+
+import numpy as np
+
+from logger import logger
+from utils import find_incident_event_files
+
+# WhoScored coordinates are percentages of the pitch, every team attacks towards
+# x = 100. Distances are converted to metres with a standard pitch size.
+PITCH_LENGTH = 105.0
+PITCH_WIDTH = 68.0
+
+PASS = 1
+SHOT_TYPES = (13, 14, 15, 16)
+SUCCESSFUL = 1
+
+MISSING = -1
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("id", np.int64),
+        ("match_id", np.int32),
+        ("event_id", np.int32),
+        ("minute", np.int16),
+        ("second", np.int16),
+        ("expanded_minute", np.int16),
+        ("period_value", np.int8),
+        ("team_id", np.int32),
+        ("player_id", np.int32),
+        ("x", np.float32),
+        ("y", np.float32),
+        ("end_x", np.float32),
+        ("end_y", np.float32),
+        ("goal_mouth_x", np.float32),
+        ("goal_mouth_y", np.float32),
+        ("type_value", np.int16),
+        ("outcome", np.int8),
+        ("card_type_value", np.int16),
+        ("related_event_id", np.int32),
+        ("related_player_id", np.int32),
+        ("is_touch", np.bool_),
+        ("is_goal", np.bool_),
+        ("is_shot", np.bool_),
+    ]
+)
+
+# Field name -> how to read it from an ``incidentEvents`` entry. Missing numbers
+# are NaN for coordinates and MISSING for ids and codes.
+_FLAT_FIELDS = {
+    "id": "id",
+    "event_id": "eventId",
+    "minute": "minute",
+    "second": "second",
+    "expanded_minute": "expandedMinute",
+    "team_id": "teamId",
+    "player_id": "playerId",
+    "x": "x",
+    "y": "y",
+    "end_x": "endX",
+    "end_y": "endY",
+    "goal_mouth_x": "goalMouthX",
+    "goal_mouth_y": "goalMouthY",
+    "related_event_id": "relatedEventId",
+    "related_player_id": "relatedPlayerId",
+    "is_touch": "isTouch",
+    "is_goal": "isGoal",
+    "is_shot": "isShot",
+}
+_NESTED_FIELDS = {
+    "period_value": "period",
+    "type_value": "type",
+    "outcome": "outcomeType",
+    "card_type_value": "cardType",
+}
+
+
+def _default(field: str):
+    kind = EVENT_DTYPE[field].kind
+    if kind == "f":
+        return np.nan
+    if kind == "b":
+        return False
+    return MISSING
+
+
+def events_from_match_centre(data: dict, match_id: int) -> np.ndarray:
+    """Decodes the incident events of one ``matchCentreData`` into a structured array.
+
+    Every field is filled column by column, no per-event objects are created.
+    """
+    incident_events = data.get("home", {}).get("incidentEvents", []) + data.get(
+        "away", {}
+    ).get("incidentEvents", [])
+    count = len(incident_events)
+    events = np.empty(count, dtype=EVENT_DTYPE)
+    events["match_id"] = match_id
+
+    for field, key in _FLAT_FIELDS.items():
+        default = _default(field)
+        values = (event.get(key) for event in incident_events)
+        events[field] = np.fromiter(
+            (default if value is None else value for value in values),
+            dtype=EVENT_DTYPE[field],
+            count=count,
+        )
+
+    for field, key in _NESTED_FIELDS.items():
+        default = _default(field)
+        events[field] = np.fromiter(
+            ((event.get(key) or {}).get("value", default) for event in incident_events),
+            dtype=EVENT_DTYPE[field],
+            count=count,
+        )
+    return events
+
+
+def load_match_events(json_file: str) -> np.ndarray:
+    match_id = int(json_file.split("_")[-1].split(".")[0])
+    with open(json_file, "r", encoding="utf-8") as file:
+        return events_from_match_centre(json.load(file), match_id)
+
+
+def load_events(json_files: list[str] = None) -> np.ndarray:
+    """Loads the events of many matches into one structured array."""
+    if json_files is None:
+        json_files = find_incident_event_files()
+
+    arrays = []
+    for json_file in json_files:
+        try:
+            arrays.append(load_match_events(json_file))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load events of {json_file}: {e}")
+
+    if not arrays:
+        return np.empty(0, dtype=EVENT_DTYPE)
+    return np.concatenate(arrays)
+
+
+def passes(events: np.ndarray, successful: bool = False) -> np.ndarray:
+    mask = events["type_value"] == PASS
+    if successful:
+        mask &= events["outcome"] == SUCCESSFUL
+    return events[mask]
+
+
+def shots(events: np.ndarray) -> np.ndarray:
+    return events[np.isin(events["type_value"], SHOT_TYPES)]
+
+
+def zone_grid(
+    events: np.ndarray, bins: tuple[int, int] = (12, 8), end: bool = False
+) -> np.ndarray:
+    """Counts events per pitch zone, by start or by ``end`` location.
+
+    The grid has ``bins[0]`` zones along the length and ``bins[1]`` across.
+    """
+    x, y = ("end_x", "end_y") if end else ("x", "y")
+    mask = ~(np.isnan(events[x]) | np.isnan(events[y]))
+    grid, _, _ = np.histogram2d(
+        events[x][mask], events[y][mask], bins=bins, range=[[0, 100], [0, 100]]
+    )
+    return grid
+
+
+def zone_grids_by(
+    events: np.ndarray, key: str, bins: tuple[int, int] = (12, 8), end: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """Zone grids for every distinct ``key`` (e.g. ``match_id`` or ``team_id``).
+
+    Returns the keys and a ``(len(keys), *bins)`` array of grids, computed with
+    one bincount over all events.
+    """
+    x, y = ("end_x", "end_y") if end else ("x", "y")
+    events = events[~(np.isnan(events[x]) | np.isnan(events[y]))]
+    keys, group = np.unique(events[key], return_inverse=True)
+
+    column = np.clip((events[x] / 100 * bins[0]).astype(np.intp), 0, bins[0] - 1)
+    row = np.clip((events[y] / 100 * bins[1]).astype(np.intp), 0, bins[1] - 1)
+    cells = (group * bins[0] + column) * bins[1] + row
+    grids = np.bincount(cells, minlength=len(keys) * bins[0] * bins[1])
+    return keys, grids.reshape(len(keys), *bins)
+
+
+def player_counts(events: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the player ids and how many of ``events`` each of them has."""
+    player_ids = events["player_id"]
+    return np.unique(player_ids[player_ids != MISSING], return_counts=True)
+
+
+def progressive_distance(events: np.ndarray) -> np.ndarray:
+    """Metres every event moved the ball towards the opponent goal.
+
+    The result is NaN for events without an end location and negative for
+    events that moved the ball away from the goal.
+    """
+
+    def distance_to_goal(x, y):
+        return np.hypot((100 - x) * PITCH_LENGTH / 100, (50 - y) * PITCH_WIDTH / 100)
+
+    return distance_to_goal(events["x"], events["y"]) - distance_to_goal(
+        events["end_x"], events["end_y"]
+    )
+
+
+def sum_by(
+    events: np.ndarray, key: str, values: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sums ``values`` per distinct ``key`` of ``events``, ignoring NaN."""
+    keys, group = np.unique(events[key], return_inverse=True)
+    totals = np.bincount(
+        group, weights=np.nan_to_num(values, nan=0.0), minlength=len(keys)
+    )
+    return keys, totals
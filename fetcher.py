@@ -0,0 +1,179 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from constants import (
+    ESCALATION_COOLDOWN,
+    ESCALATION_THRESHOLD,
+    SESSION_COOKIE_TTL,
+)
+from logger import logger
+from utils import SingleFlight, get_client
+
+BLOCKED_STATUS_CODES = {403, 429, 503, 520, 521, 522, 523, 524, 525, 526}
+CHALLENGE_MARKERS = (
+    "525: SSL handshake failed",
+    "Just a moment...",
+    "challenge-platform",
+    "cf-browser-verification",
+    "_Incapsula_Resource",
+)
+
+
+def is_blocked(response: httpx.Response) -> bool:
+    """True for challenge pages, bot blocks and empty bodies."""
+    if response.status_code in BLOCKED_STATUS_CODES or not response.content:
+        return True
+
+    head = response.text[:4096]
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+class SessionBridge:
+    """Copies the cookies of the browser context into the shared httpx client.
+
+    Once Playwright got through a challenge, its clearance cookies let plain
+    httpx requests through as well, as both send the same user agent. A
+    session is refreshed through the browser when its cookies expire and
+    dropped as soon as httpx gets blocked with it.
+    """
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self._cookies: dict[str, list[tuple[str, str, str]]] = {}
+        self._expires: dict[str, float] = {}
+
+    def has_session(self, host: str) -> bool:
+        return host in self._expires
+
+    def is_fresh(self, host: str) -> bool:
+        # Refresh a minute early so requests in flight do not hit an expired cookie.
+        return self._expires.get(host, 0) > time.time() + 60
+
+    async def harvest(self, pool, url: str) -> None:
+        host = urlparse(url).netloc
+        cookies = await pool.cookies(url)
+        if not cookies:
+            return
+
+        self.drop(host)
+        for cookie in cookies:
+            self.client.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie["domain"],
+                path=cookie["path"],
+            )
+        self._cookies[host] = [
+            (cookie["name"], cookie["domain"], cookie["path"]) for cookie in cookies
+        ]
+        expires = [cookie["expires"] for cookie in cookies if cookie["expires"] > 0]
+        self._expires[host] = min(expires, default=time.time() + SESSION_COOKIE_TTL)
+        logger.info(f"Harvested {len(cookies)} browser cookies for {host}")
+
+    def drop(self, host: str) -> None:
+        for name, domain, path in self._cookies.pop(host, []):
+            self.client.cookies.delete(name, domain=domain, path=path)
+        self._expires.pop(host, None)
+
+
+class HybridFetcher:
+    """Fetches pages with httpx and escalates only blocked ones to Playwright.
+
+    The browser pool is launched on the first escalation. A host that is
+    blocked ``ESCALATION_THRESHOLD`` times in a row is sent straight to the
+    browser for ``ESCALATION_COOLDOWN`` seconds, after which httpx is tried
+    again. Cookies of successful browser fetches are bridged into the httpx
+    client, so most requests after an escalation go over plain HTTP again.
+    """
+
+    def __init__(self):
+        self.client = get_client()
+        self.bridge = SessionBridge(self.client)
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        self._blocked_in_row: dict[str, int] = {}
+        self._escalated_until: dict[str, float] = {}
+        self._bridge_failed_until: dict[str, float] = {}
+        self._fetches = SingleFlight()
+
+    async def __aenter__(self) -> "HybridFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def browser_pool(self):
+        async with self._pool_lock:
+            if self._pool is None:
+                from crawler import BrowserPool
+
+                logger.info("Launching browser for escalated requests...")
+                self._pool = await BrowserPool().start()
+        return self._pool
+
+    def is_escalated(self, host: str) -> bool:
+        return self._escalated_until.get(host, 0) > time.monotonic()
+
+    def _record(self, host: str, blocked: bool) -> None:
+        if not blocked:
+            self._blocked_in_row.pop(host, None)
+            return
+
+        self._blocked_in_row[host] = self._blocked_in_row.get(host, 0) + 1
+        if self._blocked_in_row[host] >= ESCALATION_THRESHOLD:
+            logger.info(f"Escalating {host} to the browser")
+            self._escalated_until[host] = time.monotonic() + ESCALATION_COOLDOWN
+            self._blocked_in_row.pop(host)
+
+    async def _fetch_httpx(self, url: str) -> tuple[str | None, bool]:
+        """Returns the page content, and whether the request looked blocked."""
+        try:
+            response = await self.client.get(url)
+        except httpx.HTTPError as e:
+            logger.error(f"httpx request to {url} failed: {e}")
+            return None, True
+
+        if is_blocked(response):
+            logger.info(f"{url} is blocked for httpx ({response.status_code})")
+            return None, True
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch {url}: {response.status_code}")
+            return None, False
+        return response.text, False
+
+    async def _fetch_browser(self, url: str) -> str | None:
+        host = urlparse(url).netloc
+        pool = await self.browser_pool()
+        content = await pool.fetch(url)
+        if content:
+            await self.bridge.harvest(pool, url)
+            # Give httpx another chance with the fresh cookies, unless the last
+            # bridged session of this host was blocked too.
+            if self._bridge_failed_until.get(host, 0) < time.monotonic():
+                self._escalated_until.pop(host, None)
+        return content
+
+    async def fetch(self, url: str) -> str | None:
+        return await self._fetches.do(url, self._fetch, url)
+
+    async def _fetch(self, url: str) -> str | None:
+        host = urlparse(url).netloc
+        if self.bridge.has_session(host) and not self.bridge.is_fresh(host):
+            return await self._fetch_browser(url)
+
+        if not self.is_escalated(host):
+            content, blocked = await self._fetch_httpx(url)
+            if blocked and self.bridge.has_session(host):
+                logger.info(f"Browser cookies of {host} stopped working")
+                self.bridge.drop(host)
+                self._bridge_failed_until[host] = time.monotonic() + ESCALATION_COOLDOWN
+            self._record(host, blocked)
+            if not blocked:
+                return content
+
+        return await self._fetch_browser(url)
@@ -0,0 +1,257 @@
+import asyncio
+import os
+import socket
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from aggregates import materialize_stats
+from archive import forget_page, save_manifests, store_page
+from backfill import discovery_months
+from constants import (
+    JOB_BATCH_SIZE,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+)
+from database import SessionLocal, engine
+from fetcher import HybridFetcher
+from logger import logger
+from models import CrawlJob
+from parsers import parse_base_url
+from populate import populate_incident_events, populate_lineups
+from scraper import find_matches_url_by_tournaments, get_tournaments_by_month
+from utils import fetch_url, get_client
+from writer import get_writer
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobQueue:
+    """Shared queue of match URLs stored in the ``crawl_jobs`` table.
+
+    Workers claim jobs with a lease. A job that is not acknowledged before its
+    lease runs out (e.g. the worker died) becomes claimable again, so any number
+    of worker processes or nodes can share the same ``DATABASE_URI``.
+    """
+
+    def __init__(
+        self,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+
+    def enqueue(self, jobs: list[tuple[str, str]]) -> int:
+        """Adds ``(league_name, url)`` jobs, ignoring URLs that are already queued.
+
+        Returns the number of new jobs.
+        """
+        if not jobs:
+            return 0
+
+        dialect = postgresql if engine.dialect.name == "postgresql" else sqlite
+        values = [
+            {
+                "url": url,
+                "league_name": league_name,
+                "status": PENDING,
+                "attempts": 0,
+                "updated_at": _now(),
+            }
+            for league_name, url in jobs
+        ]
+        statement = (
+            dialect.insert(CrawlJob.__table__)
+            .on_conflict_do_nothing(index_elements=["url"])
+            .returning(CrawlJob.__table__.c.id)
+        )
+        with SessionLocal() as session:
+            added = len(session.execute(statement, values).all())
+            session.commit()
+            return added
+
+    def _claimable(self, now: datetime):
+        return and_(
+            CrawlJob.attempts < self.max_attempts,
+            or_(
+                CrawlJob.status == PENDING,
+                and_(CrawlJob.status == LEASED, CrawlJob.leased_until < now),
+            ),
+        )
+
+    def claim(self, worker_id: str, limit: int = JOB_BATCH_SIZE) -> list[CrawlJob]:
+        """Leases up to ``limit`` jobs to ``worker_id``.
+
+        PostgreSQL skips rows locked by other workers. Every job is then taken
+        with a conditional update, so a job is never leased to two workers even
+        on databases without row locks such as SQLite.
+        """
+        now = _now()
+        with SessionLocal() as session:
+            candidates = session.scalars(
+                select(CrawlJob.id)
+                .where(self._claimable(now))
+                .order_by(CrawlJob.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).all()
+
+            claimed = []
+            for job_id in candidates:
+                result = session.execute(
+                    update(CrawlJob)
+                    .where(CrawlJob.id == job_id, self._claimable(now))
+                    .values(
+                        status=LEASED,
+                        worker_id=worker_id,
+                        leased_until=now + self.lease,
+                        updated_at=now,
+                    )
+                )
+                if result.rowcount == 1:
+                    claimed.append(job_id)
+            session.commit()
+
+            jobs = session.scalars(
+                select(CrawlJob).where(CrawlJob.id.in_(claimed))
+            ).all()
+            session.expunge_all()
+            return list(jobs)
+
+    def ack(self, job: CrawlJob) -> None:
+        self._finish(job, status=DONE)
+
+    def nack(self, job: CrawlJob, error: str) -> None:
+        """Releases a failed job for another attempt, or fails it for good."""
+        attempts = job.attempts + 1
+        status = FAILED if attempts >= self.max_attempts else PENDING
+        self._finish(job, status=status, attempts=attempts, error=error)
+
+    def _finish(self, job: CrawlJob, **values) -> None:
+        with SessionLocal() as session:
+            session.execute(
+                update(CrawlJob)
+                .where(CrawlJob.id == job.id, CrawlJob.worker_id == job.worker_id)
+                .values(leased_until=None, updated_at=_now(), **values)
+            )
+            session.commit()
+
+    def is_drained(self) -> bool:
+        """True when no job is waiting or leased anymore."""
+        with SessionLocal() as session:
+            remaining = session.scalar(
+                select(func.count(CrawlJob.id)).where(
+                    CrawlJob.attempts < self.max_attempts,
+                    CrawlJob.status.in_([PENDING, LEASED]),
+                )
+            )
+            return remaining == 0
+
+
+async def enqueue_leagues(
+    league_urls: list[str], start: date = None, end: date = None
+) -> int:
+    """Discovers the match URLs of every league and puts them into the queue."""
+    queue = JobQueue()
+    total = 0
+    client = get_client()
+    seen = set()
+    for league_url in league_urls:
+        base_match_url, base_data_url, league_name = parse_base_url(league_url)
+        tournaments = await get_tournaments_by_month(
+            client, base_data_url, discovery_months(league_name, start, end)
+        )
+        match_urls = await find_matches_url_by_tournaments(
+            tournaments, base_match_url, league_name, seen, start, end
+        )
+        added = queue.enqueue([(league_name, url) for url in match_urls])
+        logger.info(f"{added} new jobs queued for {league_name}")
+        total += added
+    return total
+
+
+async def run_worker(
+    playwright: bool = False, hybrid: bool = False, worker_id: str = None
+) -> None:
+    """Claims jobs until the queue is drained, then populates what it fetched."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue = JobQueue()
+    stored = []
+
+    async def process(job: CrawlJob, fetch) -> None:
+        month = job.url.split("x-month=")[1]
+        match_id = job.url.split("/")[4]
+        directory = f"matches/{job.league_name}/{month}"
+        try:
+            content = await fetch(job.url)
+            if not content:
+                raise Exception("Empty response")
+
+            os.makedirs(directory, exist_ok=True)
+            changed = await store_page(content, job.league_name, month, match_id)
+        except Exception as e:
+            logger.error(f"[{worker_id}] Job {job.url} failed: {e}")
+            queue.nack(job, str(e))
+            return
+
+        queue.ack(job)
+        if changed:
+            stored.append((job.league_name, month, int(match_id)))
+
+    async def work(fetch) -> None:
+        while True:
+            jobs = queue.claim(worker_id)
+            if not jobs:
+                if queue.is_drained():
+                    break
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            logger.info(f"[{worker_id}] Claimed {len(jobs)} jobs")
+            await asyncio.gather(*(process(job, fetch) for job in jobs))
+
+    if playwright:
+        from crawler import BrowserPool
+
+        async with BrowserPool() as pool:
+            await work(pool.fetch)
+    elif hybrid:
+        async with HybridFetcher() as fetcher:
+            await work(fetcher.fetch)
+    else:
+        client = get_client()
+
+        async def fetch(url: str) -> str | None:
+            content = await fetch_url(client, url)
+            return content.decode("utf-8") if content else None
+
+        await work(fetch)
+
+    await get_writer().flush()
+    # Manifests are saved once the data is populated, see LivescoreWatcher.poll.
+    try:
+        if stored:
+            files = [
+                f"matches/{league_name}/{month}/match_centre_data_{match_id}.json"
+                for league_name, month, match_id in stored
+            ]
+            match_ids = [match_id for _, _, match_id in stored]
+            touched_match_ids = populate_incident_events(files, match_ids)
+            populate_lineups(files, match_ids)
+            materialize_stats(touched_match_ids)
+    except Exception:
+        for page in stored:
+            forget_page(*page)
+        raise
+    finally:
+        save_manifests()
@@ -0,0 +1,115 @@
+import sqlite3
+import time
+
+from constants import JOURNAL_PATH, JOURNAL_RETRY_BUDGET
+
+PENDING = "pending"
+FETCHED = "fetched"
+PARSED = "parsed"
+FAILED = "failed"
+
+TOURNAMENT = "tournament"
+MATCH = "match"
+
+
+class CrawlJournal:
+    """Persistent record of the crawl state of every tournament and match URL.
+
+    A long ``--fetch-all`` run writes its progress here, so an interrupted run
+    can be continued with ``--resume`` instead of starting from scratch.
+    Failed URLs can be re-queued until their own retry budget is spent.
+    """
+
+    def __init__(
+        self, path: str = JOURNAL_PATH, retry_budget: int = JOURNAL_RETRY_BUDGET
+    ):
+        self.retry_budget = retry_budget
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_journal (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                parent TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_crawl_journal_parent ON crawl_journal (parent)"
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def reset(self) -> None:
+        """Forget every recorded URL, used when a new run starts without --resume."""
+        self.connection.execute("DELETE FROM crawl_journal")
+        self.connection.commit()
+
+    def add(self, urls: list[str], kind: str, parent: str = None) -> None:
+        """Record URLs as pending. URLs that are already known keep their state."""
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO crawl_journal (url, kind, parent, state, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(url, kind, parent, PENDING, now) for url in urls],
+        )
+        self.connection.commit()
+
+    def mark(self, url: str, state: str, error: str = None) -> None:
+        attempts = "attempts + 1" if state == FAILED else "attempts"
+        self.connection.execute(
+            f"UPDATE crawl_journal SET state = ?, error = ?, attempts = {attempts}, "
+            "updated_at = ? WHERE url = ?",
+            (state, error, time.time(), url),
+        )
+        self.connection.commit()
+
+    def state(self, url: str) -> str | None:
+        row = self.connection.execute(
+            "SELECT state FROM crawl_journal WHERE url = ?", (url,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def unfinished(self, urls: list[str]) -> list[str]:
+        """Filter ``urls`` down to the ones that still need work, keeping order."""
+        if not urls:
+            return []
+
+        done = set()
+        # SQLite limits the number of bound parameters, so query in chunks.
+        for i in range(0, len(urls), 500):
+            chunk = urls[i : i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            done.update(
+                url
+                for url, in self.connection.execute(
+                    f"SELECT url FROM crawl_journal WHERE url IN ({placeholders}) "
+                    "AND state IN (?, ?)",
+                    (*chunk, PARSED, FAILED),
+                )
+            )
+        return [url for url in urls if url not in done]
+
+    def has_unfinished_children(self, parent: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM crawl_journal WHERE parent = ? AND state != ? LIMIT 1",
+            (parent, PARSED),
+        ).fetchone()
+        return row is not None
+
+    def requeue_failed(self) -> int:
+        """Move failed URLs that still have retry budget back to pending.
+
+        Returns the number of re-queued URLs.
+        """
+        cursor = self.connection.execute(
+            "UPDATE crawl_journal SET state = ?, updated_at = ? "
+            "WHERE state = ? AND attempts < ?",
+            (PENDING, time.time(), FAILED, self.retry_budget),
+        )
+        self.connection.commit()
+        return cursor.rowcount
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+from functools import cached_property
+
+from constants import URL_MAPPING_TTL
+from logger import logger
+from search import SearchIndex
+from writer import write_atomic
+
+BASE_URL = "https://www.whoscored.com"
+
+
+class MetadataService:
+    """Region, tournament and URL mappings, loaded once per process.
+
+    Canonical URL resolutions are kept with the time they were resolved and
+    expire after ``ttl`` seconds. New resolutions are appended to a log next to
+    ``tournament_url_mapping.json``. Both files are only rewritten, atomically,
+    once enough new entries have been appended since the last rewrite.
+    """
+
+    def __init__(self, directory: str = "matches", ttl: float = URL_MAPPING_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @property
+    def regions_path(self) -> str:
+        return os.path.join(self.directory, "all_regions.json")
+
+    @property
+    def mapping_path(self) -> str:
+        return os.path.join(self.directory, "tournament_url_mapping.json")
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.directory, "tournament_url_mapping.log")
+
+    @cached_property
+    def regions(self) -> list[dict]:
+        with open(self.regions_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    @cached_property
+    def region_names(self) -> list[str]:
+        return [region["name"] for region in self.regions]
+
+    @cached_property
+    def regions_by_name(self) -> dict[str, dict]:
+        return {region["name"]: region for region in self.regions}
+
+    @cached_property
+    def tournament_urls(self) -> list[str]:
+        return [
+            f"{BASE_URL}{league['url']}"
+            for region in self.regions
+            for league in region["tournaments"]
+        ]
+
+    @cached_property
+    def tournament_league_mapping(self) -> dict[str, str]:
+        """Maps ``<region id>_<tournament id>`` keys of livescores to league URLs."""
+        return {
+            f"{region['id']}_{league['id']}": f"{BASE_URL}{league['url']}"
+            for region in self.regions
+            for league in region["tournaments"]
+        }
+
+    @cached_property
+    def search_index(self) -> SearchIndex:
+        return SearchIndex(self.regions, BASE_URL)
+
+    @cached_property
+    def _url_mapping(self) -> dict[str, tuple[str, float]]:
+        mapping = {}
+        if os.path.exists(self.mapping_path):
+            # The mapping file has no timestamps, entries count from its mtime.
+            resolved_at = os.path.getmtime(self.mapping_path)
+            with open(self.mapping_path, "r", encoding="utf-8") as file:
+                for url, valid_url in json.load(file).items():
+                    mapping[url] = (valid_url, resolved_at)
+
+        self._appended = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        url, valid_url, resolved_at = json.loads(line)
+                    except (json.JSONDecodeError, ValueError):
+                        # A torn last line of an interrupted run.
+                        continue
+                    mapping[url] = (valid_url, resolved_at)
+        return mapping
+
+    def resolve(self, url: str) -> str | None:
+        """Returns the canonical URL of ``url`` or None if unknown or expired."""
+        entry = self._url_mapping.get(url)
+        if entry is None or entry[1] + self.ttl < time.time():
+            return None
+        return entry[0]
+
+    def unresolved(self, urls: list[str]) -> list[str]:
+        return list(dict.fromkeys(url for url in urls if self.resolve(url) is None))
+
+    def set_url(self, url: str, valid_url: str) -> None:
+        resolved_at = time.time()
+        with self._lock:
+            self._url_mapping[url] = (valid_url, resolved_at)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps([url, valid_url, resolved_at]) + "\n")
+            self._appended += 1
+
+            if self._appended >= max(len(self._url_mapping) // 2, 100):
+                self._compact()
+
+    def _compact(self) -> None:
+        logger.info("Compacting tournament URL mapping...")
+        # Keep the timestamps in the log, so the compacted log is the whole state.
+        log = "".join(
+            json.dumps([url, valid_url, resolved_at]) + "\n"
+            for url, (valid_url, resolved_at) in self._url_mapping.items()
+        )
+        write_atomic(
+            self.mapping_path,
+            {url: valid_url for url, (valid_url, _) in self._url_mapping.items()},
+            is_json=True,
+        )
+        write_atomic(self.log_path, log)
+        self._appended = 0
+
+
+metadata = MetadataService()
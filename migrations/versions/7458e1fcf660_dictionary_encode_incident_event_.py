@@ -0,0 +1,91 @@
+"""dictionary encode incident event display names
+
+Revision ID: 7458e1fcf660
+Revises: 92b5dfdac81f
+Create Date: 2026-10-19 14:56:24.685032
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7458e1fcf660"
+down_revision: Union[str, None] = "92b5dfdac81f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# lookup table -> (code column, display name column) of incident_event
+LOOKUPS = {
+    "event_types": ("type_value", "type_display_name"),
+    "outcome_types": ("outcome_type_value", "outcome_type_display_name"),
+    "periods": ("period_value", "period_display_name"),
+    "card_types": ("card_type_value", "card_type_display_name"),
+}
+
+VIEW = """
+CREATE VIEW incident_event_view AS
+SELECT
+    incident_event.*,
+    periods.display_name AS period_display_name,
+    event_types.display_name AS type_display_name,
+    outcome_types.display_name AS outcome_type_display_name,
+    card_types.display_name AS card_type_display_name
+FROM incident_event
+LEFT JOIN periods ON periods.value = incident_event.period_value
+LEFT JOIN event_types ON event_types.value = incident_event.type_value
+LEFT JOIN outcome_types ON outcome_types.value = incident_event.outcome_type_value
+LEFT JOIN card_types ON card_types.value = incident_event.card_type_value
+"""
+
+
+def upgrade() -> None:
+    for table in LOOKUPS:
+        op.create_table(
+            table,
+            sa.Column("value", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("display_name", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("value"),
+        )
+    op.create_table(
+        "satisfied_event_types",
+        sa.Column("value", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("value"),
+    )
+
+    # Seed the lookups with the values already stored, then keep only the codes.
+    for table, (value_column, name_column) in LOOKUPS.items():
+        op.execute(
+            f"INSERT INTO {table} (value, display_name) "
+            f"SELECT {value_column}, MAX({name_column}) FROM incident_event "
+            f"WHERE {value_column} IS NOT NULL GROUP BY {value_column}"
+        )
+
+    with op.batch_alter_table("incident_event") as batch_op:
+        for value_column, name_column in LOOKUPS.values():
+            batch_op.drop_column(name_column)
+
+    op.execute(VIEW)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW incident_event_view")
+
+    with op.batch_alter_table("incident_event") as batch_op:
+        for value_column, name_column in LOOKUPS.values():
+            batch_op.add_column(sa.Column(name_column, sa.VARCHAR(), nullable=True))
+
+    for table, (value_column, name_column) in LOOKUPS.items():
+        op.execute(
+            f"UPDATE incident_event SET {name_column} = ("
+            f"SELECT display_name FROM {table} "
+            f"WHERE {table}.value = incident_event.{value_column})"
+        )
+
+    op.drop_table("satisfied_event_types")
+    for table in reversed(LOOKUPS):
+        op.drop_table(table)
@@ -15,10 +15,41 @@ from sqlalchemy.orm import relationship
 Base = declarative_base()
 
 
+class EventType(Base):
+    __tablename__ = "event_types"
+    value = Column(Integer, primary_key=True, autoincrement=False)
+    display_name = Column(String)
+
+
+class OutcomeType(Base):
+    __tablename__ = "outcome_types"
+    value = Column(Integer, primary_key=True, autoincrement=False)
+    display_name = Column(String)
+
+
+class Period(Base):
+    __tablename__ = "periods"
+    value = Column(Integer, primary_key=True, autoincrement=False)
+    display_name = Column(String)
+
+
+class CardType(Base):
+    __tablename__ = "card_types"
+    value = Column(Integer, primary_key=True, autoincrement=False)
+    display_name = Column(String)
+
+
+class SatisfiedEventType(Base):
+    __tablename__ = "satisfied_event_types"
+    value = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String)
+
+
 class IncidentEvent(Base):
     __tablename__ = "incident_event"
     id = Column(BigInteger, primary_key=True, autoincrement=False)
-    match_id = Column(Integer)
+    match_id = Column(Integer, index=True)
+    season = Column(Integer, index=True)
     event_id = Column(Integer)
     minute = Column(Integer)
     second = Column(Integer)
@@ -28,11 +59,8 @@ class IncidentEvent(Base):
     y = Column(Float)
     expanded_minute = Column(Integer)
     period_value = Column(Integer)
-    period_display_name = Column(String)
     type_value = Column(Integer)
-    type_display_name = Column(String)
     outcome_type_value = Column(Integer)
-    outcome_type_display_name = Column(String)
     qualifiers = Column(JSON)
     satisfied_events_types = Column(JSON)
     is_touch = Column(Boolean)
@@ -43,11 +71,52 @@ class IncidentEvent(Base):
     related_event_id = Column(Integer)
     related_player_id = Column(Integer)
     card_type_value = Column(Integer)
-    card_type_display_name = Column(String)
     is_goal = Column(Boolean, default=False)
     is_shot = Column(Boolean, default=False)
 
 
+class Player(Base):
+    __tablename__ = "players"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String)
+    height = Column(Integer)
+    weight = Column(Integer)
+
+
+class MatchLineup(Base):
+    __tablename__ = "match_lineups"
+    match_id = Column(Integer, primary_key=True)
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True, index=True)
+    team_id = Column(Integer, index=True)
+    shirt_no = Column(Integer)
+    position = Column(String)
+    age = Column(Integer)
+    is_first_eleven = Column(Boolean, default=False)
+    is_man_of_the_match = Column(Boolean, default=False)
+    subbed_in_expanded_minute = Column(Integer)
+    subbed_out_expanded_minute = Column(Integer)
+    stats = Column(JSON)
+
+    player = relationship("Player")
+
+
+class MatchFormation(Base):
+    __tablename__ = "match_formations"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    match_id = Column(Integer, index=True)
+    team_id = Column(Integer)
+    formation_id = Column(Integer)
+    formation_name = Column(String)
+    captain_player_id = Column(Integer)
+    period = Column(Integer)
+    start_minute_expanded = Column(Integer)
+    end_minute_expanded = Column(Integer)
+    jersey_numbers = Column(JSON)
+    formation_slots = Column(JSON)
+    player_ids = Column(JSON)
+    formation_positions = Column(JSON)
+
+
 class Tournament(Base):
     __tablename__ = "tournaments"
     id = Column(Integer, primary_key=True)
@@ -72,6 +141,7 @@ class Match(Base):
     id = Column(Integer, primary_key=True)
     stage_id = Column(Integer)
     tournament_id = Column(Integer, ForeignKey("tournaments.id"))
+    season = Column(Integer, index=True)
     home_team_id = Column(Integer, ForeignKey("teams.id"))
     away_team_id = Column(Integer, ForeignKey("teams.id"))
     start_time = Column(DateTime)
@@ -112,3 +182,52 @@ class Bet(Base):
     click_out_url = Column(String)
 
     match = relationship("Match")
+
+
+class CrawlJob(Base):
+    __tablename__ = "crawl_jobs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    url = Column(String, unique=True, nullable=False)
+    league_name = Column(String)
+    status = Column(String, index=True, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    worker_id = Column(String)
+    leased_until = Column(DateTime)
+    error = Column(String)
+    updated_at = Column(DateTime)
+
+
+class MatchTeamStats(Base):
+    __tablename__ = "match_team_stats"
+    match_id = Column(Integer, ForeignKey("matches.id"), primary_key=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
+    tournament_id = Column(Integer, index=True)
+    season = Column(Integer)
+    start_time = Column(DateTime)
+    is_home = Column(Boolean)
+    result = Column(String(1))
+    goals_for = Column(Integer)
+    goals_against = Column(Integer)
+    shots = Column(Integer, default=0)
+    shots_on_target = Column(Integer, default=0)
+    passes = Column(Integer, default=0)
+    passes_completed = Column(Integer, default=0)
+    yellow_cards = Column(Integer, default=0)
+    red_cards = Column(Integer, default=0)
+
+
+class TeamSeasonStats(Base):
+    __tablename__ = "team_season_stats"
+    tournament_id = Column(Integer, primary_key=True)
+    season = Column(Integer, primary_key=True, autoincrement=False)
+    team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
+    played = Column(Integer, default=0)
+    won = Column(Integer, default=0)
+    drawn = Column(Integer, default=0)
+    lost = Column(Integer, default=0)
+    goals_for = Column(Integer, default=0)
+    goals_against = Column(Integer, default=0)
+    points = Column(Integer, default=0)
+    shots = Column(Integer, default=0)
+    passes_completed = Column(Integer, default=0)
+    form = Column(String)
@@ -1,14 +1,60 @@
 import json
 import os
+from typing import NamedTuple
 
 from bs4 import BeautifulSoup
 
-from utils import write_file
+from utils import content_hash, write_file
 
 from logger import logger
 
+# Bump whenever parse_match_html extracts something new or differently, so
+# --reparse processes pages that were parsed by an older version again.
+PARSER_VERSION = 1
+
+
+class MatchPage(NamedTuple):
+    match_id: int
+    match_centre_data: dict
+    data_hash: str
+
+
+def parse_match_html(
+    html_content: str,
+    month: str,
+    league_name: str,
+    known_hash: str = None,
+    write_files: bool = True,
+) -> MatchPage | None:
+    """Extracts the match centre data of a match page into its JSON files.
+
+    Returns the data with its fingerprint, or None for pages without any.
+    See :func:`extract_match_page` for the files written.
+    """
+    page, files = extract_match_page(
+        html_content, month, league_name, known_hash, write_files
+    )
+    for file_name, content in files.items():
+        write_file(file_name, content, is_json=True)
+    return page
+
+
+def extract_match_page(
+    html_content: str,
+    month: str,
+    league_name: str,
+    known_hash: str = None,
+    write_files: bool = True,
+) -> tuple[MatchPage | None, dict[str, object]]:
+    """Extracts the match centre data of a match page without writing anything.
+
+    Returns the page, as :func:`parse_match_html` does, and the JSON files to
+    write by name. ``match_centre_data_<id>.json`` is only among them when
+    the fingerprint differs from ``known_hash``, and never without
+    ``write_files``.
+    """
+    files = {}
 
-def parse_match_html(html_content: str, month: str, league_name: str) -> None:
     # Parse the HTML
     soup = BeautifulSoup(html_content, "lxml")
 
@@ -19,7 +65,7 @@ def parse_match_html(html_content: str, month: str, league_name: str) -> None:
         filter(lambda tag: 'require.config.params["args"]' in tag.text, scripts), None
     )
     if not data_script:
-        return None
+        return None, files
 
     json_str = data_script.text[
         data_script.text.find("{") : data_script.text.rfind("}") + 1
@@ -34,7 +80,7 @@ def parse_match_html(html_content: str, month: str, league_name: str) -> None:
         logger.error(
             f"No 'match centre data' found for match {match_id}. Month: {month} League: {league_name}"
         )
-        return None
+        return None, files
 
     json_str = (
         json_str.replace("\n", "")
@@ -48,31 +94,34 @@ def parse_match_html(html_content: str, month: str, league_name: str) -> None:
     # Parse the corrected JSON string
     json_data = json.loads(json_str)
 
+    page = None
     if match_centre_data := json_data.get("matchCentreData"):
-        write_file(
-            f"matches/{league_name}/{month}/match_centre_data_{match_id}.json",
-            match_centre_data,
-            is_json=True,
+        data_hash = content_hash(json.dumps(match_centre_data, sort_keys=True))
+        page = MatchPage(int(match_id), match_centre_data, data_hash)
+        match_centre_file = (
+            f"matches/{league_name}/{month}/match_centre_data_{match_id}.json"
         )
+        if write_files and (
+            data_hash != known_hash or not os.path.exists(match_centre_file)
+        ):
+            files[match_centre_file] = match_centre_data
 
     if not os.path.exists(
         f"matches/{league_name}/{month}/formation_id_name_mappings.json"
     ):
-        write_file(
-            f"matches/{league_name}/{month}/formation_id_name_mappings.json",
-            json_data["formationIdNameMappings"],
-            is_json=True,
+        files[f"matches/{league_name}/{month}/formation_id_name_mappings.json"] = (
+            json_data["formationIdNameMappings"]
         )
 
     if not os.path.exists(
         f"matches/{league_name}/{month}/match_centre_event_type.json"
     ):
-        write_file(
-            f"matches/{league_name}/{month}/match_centre_event_type.json",
-            json_data["matchCentreEventTypeJson"],
-            is_json=True,
+        files[f"matches/{league_name}/{month}/match_centre_event_type.json"] = (
+            json_data["matchCentreEventTypeJson"]
         )
 
+    return page, files
+
 
 def parse_base_data(html_content: str) -> None:
     soup = BeautifulSoup(html_content, "lxml")
@@ -107,7 +156,7 @@ def parse_base_url(base_url: str) -> tuple[str, str, str]:
     league_name = base_url.split("/")[-1]
     stage_id = base_url.split("/")[-3]
 
-    data_url = f"https://www.whoscored.com/tournaments/{stage_id}/data/?d=2024{{month:02d}}&isAggregate=false"
+    data_url = f"https://www.whoscored.com/tournaments/{stage_id}/data/?d={{year}}{{month:02d}}&isAggregate=false"
     # x-month is used to indicate the month of the match in the URL for development purposes.
     match_url = f"https://www.whoscored.com/Matches/{{match_id}}/Live/{league_name}-{{home_team}}-{{away_team}}?x-month={{month}}"
 
@@ -0,0 +1,115 @@
+from sqlalchemy import text
+
+from database import SessionLocal, engine
+from logger import logger
+
+TABLE = "incident_event"
+VIEW = "incident_event_view"
+
+# Partition key of events whose match has no known season.
+UNKNOWN_SEASON = 0
+
+
+def partition_name(season: int) -> str:
+    return f"{TABLE}_{season}"
+
+
+def is_partitioned(session) -> bool:
+    """True when ``incident_event`` is a partitioned PostgreSQL table."""
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(
+        session.scalar(
+            text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table)"
+            ),
+            {"table": TABLE},
+        )
+    )
+
+
+def ensure_partitions(session, seasons) -> None:
+    for season in seasons:
+        session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(season)} "
+                f"PARTITION OF {TABLE} FOR VALUES IN ({int(season)})"
+            )
+        )
+
+
+def partition_incident_events() -> None:
+    """Converts ``incident_event`` into a table list-partitioned by season.
+
+    Only PostgreSQL is supported. Every season gets its own partition, so
+    per-season queries, vacuums and retention only touch that season. The
+    primary key becomes ``(id, season)``, as PostgreSQL requires the
+    partition key in it. The readable view is recreated on the new table.
+    """
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("Partitioning is only supported on PostgreSQL.")
+
+    with SessionLocal() as session:
+        if is_partitioned(session):
+            logger.info(f"{TABLE} is already partitioned.")
+            return
+
+        view = session.scalar(
+            text("SELECT pg_get_viewdef(to_regclass(:view))"), {"view": VIEW}
+        )
+        legacy = f"{TABLE}_legacy"
+        if view:
+            session.execute(text(f"DROP VIEW {VIEW}"))
+        session.execute(text(f"ALTER TABLE {TABLE} RENAME TO {legacy}"))
+        session.execute(
+            text(
+                f"ALTER TABLE {legacy} RENAME CONSTRAINT {TABLE}_pkey TO {legacy}_pkey"
+            )
+        )
+        for column in ("season", "match_id"):
+            session.execute(
+                text(
+                    f"ALTER INDEX IF EXISTS ix_{TABLE}_{column} "
+                    f"RENAME TO ix_{legacy}_{column}"
+                )
+            )
+        session.execute(
+            text(
+                f"CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS) "
+                "PARTITION BY LIST (season)"
+            )
+        )
+        session.execute(
+            text(f"UPDATE {legacy} SET season = {UNKNOWN_SEASON} WHERE season IS NULL")
+        )
+        session.execute(text(f"ALTER TABLE {TABLE} ALTER COLUMN season SET NOT NULL"))
+        session.execute(text(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, season)"))
+        session.execute(text(f"CREATE INDEX ix_{TABLE}_season ON {TABLE} (season)"))
+        session.execute(text(f"CREATE INDEX ix_{TABLE}_match_id ON {TABLE} (match_id)"))
+
+        seasons = session.scalars(text(f"SELECT DISTINCT season FROM {legacy}")).all()
+        ensure_partitions(session, set(seasons) | {UNKNOWN_SEASON})
+        session.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {legacy}"))
+        session.execute(text(f"DROP TABLE {legacy}"))
+        if view:
+            session.execute(text(f"CREATE VIEW {VIEW} AS {view}"))
+        session.commit()
+    logger.info(f"{TABLE} has been partitioned into {len(seasons)} seasons.")
+
+
+def drop_season(season: int) -> None:
+    """Deletes every incident event of ``season``.
+
+    On a partitioned table the season's partition is dropped, which frees
+    its space at once instead of leaving dead rows to vacuum.
+    """
+    with SessionLocal() as session:
+        if is_partitioned(session):
+            session.execute(text(f"DROP TABLE IF EXISTS {partition_name(season)}"))
+        else:
+            session.execute(
+                text(f"DELETE FROM {TABLE} WHERE season = :season"), {"season": season}
+            )
+        session.commit()
+    logger.info(f"Incident events of season {season} have been deleted.")
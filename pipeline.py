@@ -0,0 +1,269 @@
+import asyncio
+import contextlib
+
+import msgspec
+
+from aggregates import materialize_stats
+from constants import PIPELINE_BATCH_SIZE, PIPELINE_QUEUE_SIZE, RETRY_LIMIT
+from database import SessionLocal
+from logger import logger
+from parsers import MatchPage
+from populate import (
+    insert_incident_events,
+    insert_lineups,
+    load_data,
+    populate_incident_events,
+    populate_lineups,
+    seed_satisfied_event_types,
+)
+from schemas import MatchCentreEvents, MatchCentreLineups
+
+TOURNAMENTS = "tournaments"
+MATCH_PAGE = "match_page"
+
+# Collected changes are populated in chunks, to keep the id lookups short.
+CHANGES_CHUNK_SIZE = 500
+
+
+class DatabaseSink:
+    """Writes scraped data into the database while the crawl is still running.
+
+    Scrapers hand over tournaments (with their matches, incidents and bets)
+    and parsed match pages as soon as they have them. A single consumer groups
+    them into batches of up to ``batch_size`` items and inserts every batch
+    from a worker thread, so fetching, parsing and database writes overlap.
+    The queue is bounded, producers wait when the database falls behind.
+
+    A failed batch is retried up to ``RETRY_LIMIT`` times. Pages come with a
+    callback that records their fingerprints, which only runs once the page
+    is in the database, so a page that never got there is parsed again by
+    the next run. Closing the sink raises if anything was lost.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = PIPELINE_BATCH_SIZE,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        write_files: bool = True,
+    ):
+        self.batch_size = batch_size
+        self.write_files = write_files
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.match_ids: set[int] = set()
+        self.lost = 0
+        self._consumer: asyncio.Task | None = None
+
+    async def put(self, kind: str, item) -> None:
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume())
+        await self.queue.put((kind, item))
+
+    async def put_tournaments(self, tournaments: list[dict]) -> None:
+        if tournaments:
+            await self.put(TOURNAMENTS, tournaments)
+
+    async def put_page(self, page: MatchPage, on_stored=None) -> None:
+        await self.put(MATCH_PAGE, (page, on_stored))
+
+    async def _consume(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            try:
+                await self._write_with_retries(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _write_with_retries(self, batch: list[tuple[str, object]]) -> None:
+        for attempt in range(RETRY_LIMIT):
+            try:
+                await asyncio.to_thread(self._write, batch)
+                break
+            except Exception as e:
+                logger.error(
+                    f"Attempt {attempt + 1} to write {len(batch)} scraped items "
+                    f"failed: {e}"
+                )
+                await asyncio.sleep(1)
+        else:
+            logger.error(f"Failed to write {len(batch)} scraped items, skipping them.")
+            self.lost += len(batch)
+            return
+
+        for kind, item in batch:
+            if kind == MATCH_PAGE and (on_stored := item[1]):
+                on_stored()
+
+    def _write(self, batch: list[tuple[str, object]]) -> None:
+        # Matches go first, events look up the season of their match.
+        tournaments = [
+            tournament
+            for kind, items in batch
+            if kind == TOURNAMENTS
+            for tournament in items
+        ]
+        if tournaments:
+            self.match_ids.update(load_data(tournaments))
+
+        events, lineups = [], []
+        for kind, item in batch:
+            if kind != MATCH_PAGE:
+                continue
+            page = item[0]
+            # Events and lineups are decoded apart, so one malformed part
+            # doesn't reject the other.
+            for schema, decoded in (
+                (MatchCentreEvents, events),
+                (MatchCentreLineups, lineups),
+            ):
+                try:
+                    data = msgspec.convert(page.match_centre_data, schema, strict=False)
+                except msgspec.ValidationError as e:
+                    logger.error(f"Invalid match centre data of {page.match_id}: {e}")
+                    continue
+                decoded.append((page.match_id, data))
+
+        if events:
+            match_ids = [match_id for match_id, _ in events]
+            self.match_ids.update(insert_incident_events(events, match_ids))
+        if lineups:
+            insert_lineups(lineups, [match_id for match_id, _ in lineups])
+
+    def _finish(self) -> None:
+        with SessionLocal() as session:
+            seed_satisfied_event_types(session)
+        materialize_stats(self.match_ids)
+
+    async def flush(self) -> None:
+        """Waits until every queued item is in the database."""
+        await self.queue.join()
+
+    async def close(self) -> None:
+        if self._consumer is not None:
+            await self.flush()
+            self._consumer.cancel()
+            await asyncio.gather(self._consumer, return_exceptions=True)
+            self._consumer = None
+        await asyncio.to_thread(self._finish)
+        if self.lost:
+            raise RuntimeError(
+                f"{self.lost} scraped items could not be written to the database."
+            )
+
+
+class ChangeCollector:
+    """Remembers what a scrape changed and populates only that once it is done.
+
+    Used by ``--run`` and ``--fetch-recent`` without ``--stream``: the
+    tournaments and the match centre files of changed pages are loaded after
+    the crawl, instead of every scraped file. As with the sink, the
+    fingerprints of a page are recorded once it is in the database.
+    """
+
+    def __init__(self):
+        self.tournaments: list[dict] = []
+        self.pages: dict[int, tuple[str, object]] = {}
+
+    def put_tournaments(self, tournaments: list[dict]) -> None:
+        self.tournaments.extend(tournaments)
+
+    def put_page(self, page: MatchPage, path: str, on_stored=None) -> None:
+        self.pages[page.match_id] = (path, on_stored)
+
+    def populate(self) -> None:
+        match_ids = []
+        for start in range(0, len(self.tournaments), CHANGES_CHUNK_SIZE):
+            match_ids.extend(
+                load_data(self.tournaments[start : start + CHANGES_CHUNK_SIZE])
+            )
+
+        pages = list(self.pages.items())
+        for start in range(0, len(pages), CHANGES_CHUNK_SIZE):
+            chunk = pages[start : start + CHANGES_CHUNK_SIZE]
+            files = [path for _, (path, _) in chunk]
+            chunk_ids = [match_id for match_id, _ in chunk]
+            match_ids.extend(populate_incident_events(files, chunk_ids))
+            populate_lineups(files, chunk_ids)
+
+        materialize_stats(match_ids)
+        for _, on_stored in self.pages.values():
+            if on_stored:
+                on_stored()
+
+
+_sink: DatabaseSink | None = None
+_collector: ChangeCollector | None = None
+
+
+def get_sink() -> DatabaseSink | None:
+    """The sink of the running ``--stream`` scrape, None outside of one."""
+    return _sink
+
+
+@contextlib.asynccontextmanager
+async def streaming(write_files: bool = True):
+    """Streams everything scraped inside the block into the database."""
+    global _sink
+    _sink = DatabaseSink(write_files=write_files)
+    try:
+        yield _sink
+    finally:
+        # archive imports this module, and records fingerprints through it.
+        from archive import save_manifests
+
+        sink, _sink = _sink, None
+        try:
+            await sink.close()
+        finally:
+            save_manifests()
+
+
+@contextlib.asynccontextmanager
+async def collecting():
+    """Populates what is scraped inside the block once the block is done.
+
+    Nothing is populated when the block fails. The changed pages keep no
+    fingerprints then and are parsed again by the next run.
+    """
+    global _collector
+    _collector = ChangeCollector()
+    try:
+        yield _collector
+        await asyncio.to_thread(_collector.populate)
+    finally:
+        from archive import save_manifests
+
+        _collector = None
+        save_manifests()
+
+
+def defers_fingerprints() -> bool:
+    """True while changed pages are handed over to be populated."""
+    return _sink is not None or _collector is not None
+
+
+def write_json_files() -> bool:
+    """False while streaming with the JSON side output turned off."""
+    return _sink is None or _sink.write_files
+
+
+async def publish_tournaments(tournaments: list[dict]) -> None:
+    if _sink is not None:
+        await _sink.put_tournaments(tournaments)
+    elif _collector is not None:
+        _collector.put_tournaments(tournaments)
+
+
+async def publish_page(page: MatchPage, path: str, on_stored=None) -> None:
+    """Hands a page to the sink or the collector.
+
+    ``path`` is its match centre file, which the collector populates from.
+    ``on_stored`` runs once the page is in the database.
+    """
+    if _sink is not None:
+        await _sink.put_page(page, on_stored)
+    elif _collector is not None:
+        _collector.put_page(page, path, on_stored)
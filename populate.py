@@ -1,113 +1,490 @@
+import contextlib
 import json
+import re
+from collections import defaultdict
 from datetime import datetime
+from typing import Iterable
 
+import msgspec
+from sqlalchemy.dialects import postgresql, sqlite
 from tqdm import tqdm
 
-from database import SessionLocal
+from aggregates import materialize_stats
+from database import SessionLocal, deferred_indexes
 from logger import logger
-from models import Bet, Incident, IncidentEvent, Match, Team, Tournament
-from utils import find_incident_event_files, find_match_files
+from models import (
+    Bet,
+    CardType,
+    EventType,
+    Incident,
+    IncidentEvent,
+    Match,
+    MatchFormation,
+    MatchLineup,
+    OutcomeType,
+    Period,
+    Player,
+    SatisfiedEventType,
+    Team,
+    Tournament,
+)
+from partitions import UNKNOWN_SEASON, ensure_partitions, is_partitioned
+from schemas import (
+    Code,
+    Event,
+    Formation,
+    MatchCentreEvents,
+    MatchCentreLineups,
+    Player as PlayerData,
+    load_incident_events,
+    load_lineups,
+)
+from utils import find_event_type_files, find_incident_event_files, find_match_files
+
+# Event codes whose display names are stored in lookup tables.
+LOOKUP_MODELS = {
+    "type": EventType,
+    "outcome_type": OutcomeType,
+    "period": Period,
+    "card_type": CardType,
+}
+
+
+def _code(code: Code | None) -> int | None:
+    return code.value if code else None
+
+
+def _incident_event_row(event: Event, match_id: int, season: int | None) -> dict:
+    return {
+        "id": event.id,
+        "event_id": event.event_id,
+        "match_id": match_id,
+        "season": season,
+        "minute": event.minute,
+        "second": event.second,
+        "team_id": event.team_id,
+        "player_id": event.player_id,
+        "x": event.x,
+        "y": event.y,
+        "expanded_minute": event.expanded_minute,
+        "period_value": _code(event.period),
+        "type_value": _code(event.type),
+        "outcome_type_value": _code(event.outcome_type),
+        "qualifiers": event.qualifiers,
+        "satisfied_events_types": event.satisfied_events_types,
+        "is_touch": event.is_touch,
+        "end_x": event.end_x,
+        "end_y": event.end_y,
+        "goal_mouth_x": event.goal_mouth_x,
+        "goal_mouth_y": event.goal_mouth_y,
+        "related_event_id": event.related_event_id,
+        "related_player_id": event.related_player_id,
+        "card_type_value": _code(event.card_type),
+        "is_goal": event.is_goal,
+        "is_shot": event.is_shot,
+    }
+
+
+def _insert_lookups(session, model, rows: list[dict]) -> None:
+    """Inserts lookup rows, skipping the values another worker inserted first."""
+    if not rows:
+        return
+
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    session.execute(
+        dialect.insert(model.__table__).on_conflict_do_nothing(
+            index_elements=["value"]
+        ),
+        rows,
+    )
+
+
+def seed_satisfied_event_types(session) -> None:
+    """Loads the satisfied event type names of ``match_centre_event_type.json``."""
+    known = set(value for value, in session.query(SatisfiedEventType.value).all())
+    new_event_types = []
+    for json_file in find_event_type_files():
+        with open(json_file, "r", encoding="utf-8") as file:
+            try:
+                event_types = json.load(file)
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to load {json_file}: {e}")
+                continue
+
+        for name, value in event_types.items():
+            if value not in known:
+                known.add(value)
+                new_event_types.append({"value": value, "name": name})
+    _insert_lookups(session, SatisfiedEventType, new_event_types)
+    session.commit()
+
+
+def _read_match_centres(json_files: list[str], loader, desc: str):
+    """Yields the ``(match_id, data)`` pairs of the files ``loader`` can decode."""
+    for json_file in tqdm(json_files, desc=desc):
+        try:
+            data = loader(json_file)
+        except (OSError, msgspec.DecodeError) as e:
+            logger.error(f"Failed to load {json_file}: {e}")
+            continue
+
+        yield int(json_file.split("_")[-1].split(".")[0]), data
+
+
+def _bulk_load(session, defer_indexes: bool, *tables: str):
+    # Rebuilding the indexes pays off for the full load of --populate only.
+    # Small batches would rebuild the indexes of the whole table, and other
+    # processes writing to the same tables would race on them.
+    if defer_indexes:
+        return deferred_indexes(session, *tables)
+    return contextlib.nullcontext()
 
 
-def populate_incident_events():
+def populate_incident_events(
+    json_files: list[str] = None,
+    match_ids: list[int] = None,
+    defer_indexes: bool = False,
+) -> set[int]:
+    """Inserts the new incident events and returns the ids of their matches.
+
+    ``match_ids`` are the matches of ``json_files``, see
+    :func:`insert_incident_events`. ``defer_indexes`` rebuilds the indexes
+    after the load, see :func:`database.deferred_indexes`.
+    """
     logger.info("Populating incident events...")
 
-    json_files = find_incident_event_files()
+    if json_files is None:
+        json_files = find_incident_event_files()
     if not json_files:
         logger.error(
             "No JSON files found in the matches folder. Please scrape data first."
         )
-        return
+        return set()
 
     logger.info(f"{len(json_files)} incident event files found.")
 
+    with SessionLocal() as session:
+        seed_satisfied_event_types(session)
+
+    touched_match_ids = insert_incident_events(
+        _read_match_centres(
+            json_files, load_incident_events, "Populating incident events"
+        ),
+        match_ids,
+        defer_indexes,
+    )
+    logger.info("Incident events have been populated successfully!")
+    return touched_match_ids
+
+
+def insert_incident_events(
+    match_centres: Iterable[tuple[int, MatchCentreEvents]],
+    match_ids: list[int] = None,
+    defer_indexes: bool = False,
+) -> set[int]:
+    """Inserts the events of ``(match_id, data)`` pairs that are not stored yet.
+
+    With ``match_ids``, only the events and seasons of those matches are
+    looked up instead of whole tables. Returns the ids of the matches that got
+    new events.
+    """
     session = SessionLocal()
 
     # Get existing incident event IDs to avoid duplicates
-    existing_incident_event_ids = set(
-        ie_id for ie_id, in session.query(IncidentEvent.id).all()
-    )
+    query = session.query(IncidentEvent.id)
+    if match_ids is not None:
+        query = query.filter(IncidentEvent.match_id.in_(match_ids))
+    existing_incident_event_ids = set(ie_id for ie_id, in query.all())
     logger.info(
         f"{len(existing_incident_event_ids)} existing incident events found. Skipping duplicates..."
     )
 
-    new_incident_events = []
+    known_lookups = {
+        key: set(value for value, in session.query(model.value).all())
+        for key, model in LOOKUP_MODELS.items()
+    }
+
+    # Events are batched per season. On a partitioned table every batch then
+    # goes to a single partition, created on first use.
+    partitioned = is_partitioned(session)
+    query = session.query(Match.id, Match.season)
+    if match_ids is not None:
+        query = query.filter(Match.id.in_(match_ids))
+    match_seasons = dict(query.all())
+    new_lookups = defaultdict(list)
+    new_incident_events = defaultdict(list)
+    touched_match_ids = set()
+
+    def save(season: int) -> None:
+        if partitioned:
+            ensure_partitions(session, [season])
+        for model, rows in new_lookups.items():
+            _insert_lookups(session, model, rows)
+        session.bulk_insert_mappings(IncidentEvent, new_incident_events.pop(season))
+        session.commit()
+        new_lookups.clear()
+
+    with _bulk_load(session, defer_indexes, IncidentEvent.__tablename__):
+        for match_id, data in match_centres:
+            season = match_seasons.get(match_id)
+            if partitioned and season is None:
+                season = UNKNOWN_SEASON
+
+            for event in data.incident_events:
+                if event.id in existing_incident_event_ids:
+                    continue
+
+                for key, model in LOOKUP_MODELS.items():
+                    code = getattr(event, key)
+                    value = _code(code)
+                    if value is not None and value not in known_lookups[key]:
+                        known_lookups[key].add(value)
+                        new_lookups[model].append(
+                            {"value": value, "display_name": code.display_name}
+                        )
+
+                new_incident_events[season].append(
+                    _incident_event_row(event, match_id, season)
+                )
+                existing_incident_event_ids.add(event.id)
+                touched_match_ids.add(match_id)
+
+            # Commit in batches of 1000 to optimize database interaction
+            if len(new_incident_events[season]) >= 1000:
+                save(season)
+
+        for season in list(new_incident_events):
+            save(season)
+
+    session.close()
+    return touched_match_ids
+
+
+def _lineup_row(player: PlayerData, match_id: int, team_id: int | None) -> dict:
+    return {
+        "match_id": match_id,
+        "player_id": player.player_id,
+        "team_id": team_id,
+        "shirt_no": player.shirt_no,
+        "position": player.position,
+        "age": player.age,
+        "is_first_eleven": player.is_first_eleven,
+        "is_man_of_the_match": player.is_man_of_the_match,
+        "subbed_in_expanded_minute": player.subbed_in_expanded_minute,
+        "subbed_out_expanded_minute": player.subbed_out_expanded_minute,
+        "stats": player.stats,
+    }
+
+
+def _formation_row(formation: Formation, match_id: int, team_id: int | None) -> dict:
+    return {
+        "match_id": match_id,
+        "team_id": team_id,
+        "formation_id": formation.formation_id,
+        "formation_name": formation.formation_name,
+        "captain_player_id": formation.captain_player_id,
+        "period": formation.period,
+        "start_minute_expanded": formation.start_minute_expanded,
+        "end_minute_expanded": formation.end_minute_expanded,
+        "jersey_numbers": formation.jersey_numbers,
+        "formation_slots": formation.formation_slots,
+        "player_ids": formation.player_ids,
+        "formation_positions": msgspec.to_builtins(formation.formation_positions),
+    }
+
+
+def populate_lineups(
+    json_files: list[str] = None,
+    match_ids: list[int] = None,
+    defer_indexes: bool = False,
+) -> None:
+    """Inserts the players, lineups and formations of matches not loaded yet.
+
+    ``match_ids`` are the matches of ``json_files``, see :func:`insert_lineups`.
+    """
+    logger.info("Populating lineups...")
+
+    if json_files is None:
+        json_files = find_incident_event_files()
+
+    # Files of matches already loaded are not even decoded.
+    with SessionLocal() as session:
+        query = session.query(MatchLineup.match_id).distinct()
+        if match_ids is not None:
+            query = query.filter(MatchLineup.match_id.in_(match_ids))
+        loaded = set(match_id for match_id, in query.all())
+    json_files = [
+        json_file
+        for json_file in json_files
+        if int(json_file.split("_")[-1].split(".")[0]) not in loaded
+    ]
+
+    insert_lineups(
+        _read_match_centres(json_files, load_lineups, "Populating lineups"),
+        match_ids,
+        defer_indexes,
+    )
+    logger.info("Lineups have been populated successfully!")
 
-    for json_file in tqdm(json_files, desc="Populating incident events"):
-        with open(json_file, "r", encoding="utf-8") as file:
-            try:
-                data = json.load(file)
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to load {json_file}: {e}")
-                continue
 
-            incident_events = data.get("home", {}).get("incidentEvents", []) + data.get(
-                "away", {}
-            ).get("incidentEvents", [])
+def insert_lineups(
+    match_centres: Iterable[tuple[int, MatchCentreLineups]],
+    match_ids: list[int] = None,
+    defer_indexes: bool = False,
+) -> None:
+    """Inserts the lineups of ``(match_id, data)`` pairs of matches not loaded yet.
 
-        match_id = json_file.split("_")[-1].split(".")[0]
+    ``match_ids`` narrows the lookup of loaded matches, as in
+    :func:`insert_incident_events`.
+    """
+    session = SessionLocal()
 
-        for event in incident_events:
-            idx = int(event.get("id"))
-            if idx in existing_incident_event_ids:
+    query = session.query(MatchLineup.match_id).distinct()
+    if match_ids is not None:
+        query = query.filter(MatchLineup.match_id.in_(match_ids))
+    existing_match_ids = set(match_id for match_id, in query.all())
+    existing_player_ids = set(
+        player_id for player_id, in session.query(Player.id).all()
+    )
+    new_players = []
+    new_lineups = []
+    new_formations = []
+
+    def save() -> None:
+        session.bulk_insert_mappings(Player, new_players)
+        session.bulk_insert_mappings(MatchLineup, new_lineups)
+        session.bulk_insert_mappings(MatchFormation, new_formations)
+        session.commit()
+        new_players.clear()
+        new_lineups.clear()
+        new_formations.clear()
+
+    with _bulk_load(
+        session,
+        defer_indexes,
+        MatchLineup.__tablename__,
+        MatchFormation.__tablename__,
+    ):
+        for match_id, data in match_centres:
+            if match_id in existing_match_ids:
                 continue
 
-            incident_event = IncidentEvent(
-                id=idx,
-                event_id=event.get("eventId"),
-                match_id=match_id,
-                minute=event.get("minute"),
-                second=event.get("second"),
-                team_id=event.get("teamId"),
-                player_id=event.get("playerId"),
-                x=event.get("x"),
-                y=event.get("y"),
-                expanded_minute=event.get("expandedMinute"),
-                period_value=event.get("period", {}).get("value"),
-                period_display_name=event.get("period", {}).get("displayName"),
-                type_value=event.get("type", {}).get("value"),
-                type_display_name=event.get("type", {}).get("displayName"),
-                outcome_type_value=event.get("outcomeType", {}).get("value"),
-                outcome_type_display_name=event.get("outcomeType", {}).get(
-                    "displayName"
-                ),
-                qualifiers=event.get("qualifiers", []),
-                satisfied_events_types=event.get("satisfiedEventsTypes", []),
-                is_touch=event.get("isTouch", False),
-                end_x=event.get("endX"),
-                end_y=event.get("endY"),
-                goal_mouth_x=event.get("goalMouthX"),
-                goal_mouth_y=event.get("goalMouthY"),
-                related_event_id=event.get("relatedEventId"),
-                related_player_id=event.get("relatedPlayerId"),
-                card_type_value=event.get("cardType", {}).get("value"),
-                card_type_display_name=event.get("cardType", {}).get("displayName"),
-                is_goal=event.get("isGoal", False),
-                is_shot=event.get("isShot", False),
-            )
+            for team in data.teams:
+                for player in team.players:
+                    if player.player_id not in existing_player_ids:
+                        existing_player_ids.add(player.player_id)
+                        new_players.append(
+                            {
+                                "id": player.player_id,
+                                "name": player.name
+                                or data.player_id_name_dictionary.get(player.player_id),
+                                "height": player.height,
+                                "weight": player.weight,
+                            }
+                        )
+                    new_lineups.append(_lineup_row(player, match_id, team.team_id))
+                for formation in team.formations:
+                    new_formations.append(
+                        _formation_row(formation, match_id, team.team_id)
+                    )
+            existing_match_ids.add(match_id)
 
-            new_incident_events.append(incident_event)
-            existing_incident_event_ids.add(idx)
+            # Commit in batches of 1000 to optimize database interaction
+            if len(new_lineups) >= 1000:
+                save()
 
-        # Commit in batches of 1000 to optimize database interaction
-        if len(new_incident_events) >= 1000:
-            session.bulk_save_objects(new_incident_events)
-            session.commit()
-            new_incident_events.clear()
+        save()
 
-    if new_incident_events:
-        session.bulk_save_objects(new_incident_events)
-        session.commit()
+    session.close()
 
-    logger.info("Incident events have been populated successfully!")
 
+def _build_tournament(tournament_data: dict) -> Tournament:
+    return Tournament(
+        id=tournament_data["tournamentId"],
+        name=tournament_data["tournamentName"],
+        season_name=tournament_data["seasonName"],
+        region_name=tournament_data["regionName"],
+        region_id=tournament_data["regionId"],
+    )
 
-def load_data():
-    logger.info("Population matches data...")
 
-    json_files = find_match_files()
+def _build_teams(match_data: dict) -> list[Team]:
+    return [
+        Team(
+            id=match_data[f"{side}TeamId"],
+            name=match_data[f"{side}TeamName"],
+            country_code=match_data[f"{side}TeamCountryCode"],
+            country_name=match_data[f"{side}TeamCountryName"],
+        )
+        for side in ("home", "away")
+    ]
+
+
+def season_start_year(season_name: str | None) -> int | None:
+    """Returns 2024 for season names such as "2024/2025" or "2024"."""
+    if season := re.match(r"\s*(\d{4})", season_name or ""):
+        return int(season.group(1))
+    return None
+
+
+def _build_match(match_data: dict, tournament_data: dict) -> Match:
+    return Match(
+        id=match_data["id"],
+        stage_id=match_data["stageId"],
+        tournament_id=tournament_data["tournamentId"],
+        season=season_start_year(tournament_data.get("seasonName")),
+        home_team_id=match_data["homeTeamId"],
+        away_team_id=match_data["awayTeamId"],
+        start_time=datetime.fromisoformat(
+            match_data["startTimeUtc"].replace("Z", "+00:00")
+        ),
+        status=match_data["status"],
+        home_score=match_data["homeScore"],
+        away_score=match_data["awayScore"],
+        period=match_data["period"],
+    )
+
+
+def _build_incidents(match_data: dict) -> list[Incident]:
+    return [
+        Incident(
+            match_id=match_data["id"],
+            minute=int(incident_data["minute"]),
+            type=incident_data["type"],
+            sub_type=incident_data["subType"],
+            player_name=incident_data["playerName"],
+            participating_player_name=incident_data.get("participatingPlayerName"),
+            field=incident_data["field"],
+            period=incident_data["period"],
+        )
+        for incident_data in match_data.get("incidents", []) or []
+    ]
+
+
+def _build_bets(match_data: dict) -> list[Bet]:
+    bets = []
+    bets_data = match_data.get("bets", {}) or {}
+    for bet_type, bet_data in bets_data.items():
+        if not bet_data:
+            continue
+
+        offers = bet_data.get("offers", []) or []
+        for offer in offers:
+            bet = Bet(
+                match_id=match_data["id"],
+                bet_name=bet_data["betName"],
+                odds_decimal=float(offer["oddsDecimal"]),
+                odds_fractional=offer["oddsFractional"],
+                provider_id=offer["providerId"],
+                click_out_url=offer["clickOutUrl"],
+            )
+            bets.append(bet)
+    return bets
+
+
+def _read_match_files() -> list[dict]:
     data = []
-    for json_file in json_files:
+    for json_file in find_match_files():
         with open(json_file, "r", encoding="utf-8") as file:
             try:
                 json_data = json.load(file)
@@ -115,6 +492,21 @@ def load_data():
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to load {json_file}: {e}")
                 continue
+    return data
+
+
+def load_data(data: list[dict] = None, defer_indexes: bool = False) -> list[int]:
+    """Inserts the new tournaments, teams and matches and returns the match ids.
+
+    ``data`` holds tournaments with their matches, as in ``matches.json``.
+    By default every scraped file is read, otherwise only the rows of
+    ``data`` are looked up to skip duplicates.
+    """
+    logger.info("Population matches data...")
+
+    scoped = data is not None
+    if not scoped:
+        data = _read_match_files()
 
     logger.info(f"{len(data)} files found")
 
@@ -126,9 +518,29 @@ def load_data():
     bets = []
 
     session = SessionLocal()
-    existing_tournament_ids = set(t_id for t_id, in session.query(Tournament.id).all())
-    existing_match_ids = set(m_id for m_id, in session.query(Match.id).all())
-    existing_team_ids = set(t_id for t_id, in session.query(Team.id).all())
+    tournament_query = session.query(Tournament.id)
+    match_query = session.query(Match.id)
+    team_query = session.query(Team.id)
+    if scoped:
+        match_data = [match for tournament in data for match in tournament["matches"]]
+        tournament_query = tournament_query.filter(
+            Tournament.id.in_({tournament["tournamentId"] for tournament in data})
+        )
+        match_query = match_query.filter(
+            Match.id.in_({match["id"] for match in match_data})
+        )
+        team_query = team_query.filter(
+            Team.id.in_(
+                {
+                    match[f"{side}TeamId"]
+                    for match in match_data
+                    for side in ("home", "away")
+                }
+            )
+        )
+    existing_tournament_ids = set(t_id for t_id, in tournament_query.all())
+    existing_match_ids = set(m_id for m_id, in match_query.all())
+    existing_team_ids = set(t_id for t_id, in team_query.all())
 
     logger.info(
         f"{len(existing_tournament_ids)} existing tournaments found. Skipping duplicates..."
@@ -147,13 +559,7 @@ def load_data():
             tournament_id not in tournaments
             and tournament_id not in existing_tournament_ids
         ):
-            tournaments[tournament_id] = Tournament(
-                id=tournament_id,
-                name=tournament_data["tournamentName"],
-                season_name=tournament_data["seasonName"],
-                region_name=tournament_data["regionName"],
-                region_id=tournament_data["regionId"],
-            )
+            tournaments[tournament_id] = _build_tournament(tournament_data)
 
         for match_data in tournament_data["matches"]:
             match_id = match_data["id"]
@@ -163,89 +569,71 @@ def load_data():
             existing_match_ids.add(match_id)
 
             # Collect teams
-            home_team_id = match_data["homeTeamId"]
-            if home_team_id not in existing_team_ids:
-                teams[home_team_id] = Team(
-                    id=home_team_id,
-                    name=match_data["homeTeamName"],
-                    country_code=match_data["homeTeamCountryCode"],
-                    country_name=match_data["homeTeamCountryName"],
-                )
-                existing_team_ids.add(home_team_id)
-
-            away_team_id = match_data["awayTeamId"]
-            if away_team_id not in existing_team_ids:
-                teams[away_team_id] = Team(
-                    id=away_team_id,
-                    name=match_data["awayTeamName"],
-                    country_code=match_data["awayTeamCountryCode"],
-                    country_name=match_data["awayTeamCountryName"],
-                )
-                existing_team_ids.add(away_team_id)
+            for team in _build_teams(match_data):
+                if team.id not in existing_team_ids:
+                    teams[team.id] = team
+                    existing_team_ids.add(team.id)
 
             # Collect matches
-            match = Match(
-                id=match_id,
-                stage_id=match_data["stageId"],
-                tournament_id=tournament_id,
-                home_team_id=home_team_id,
-                away_team_id=away_team_id,
-                start_time=datetime.fromisoformat(
-                    match_data["startTimeUtc"].replace("Z", "+00:00")
-                ),
-                status=match_data["status"],
-                home_score=match_data["homeScore"],
-                away_score=match_data["awayScore"],
-                period=match_data["period"],
-            )
-            matches.append(match)
+            matches.append(_build_match(match_data, tournament_data))
 
             # Collect incidents
-            for incident_data in match_data.get("incidents", []) or []:
-                incident = Incident(
-                    match_id=match_id,
-                    minute=int(incident_data["minute"]),
-                    type=incident_data["type"],
-                    sub_type=incident_data["subType"],
-                    player_name=incident_data["playerName"],
-                    participating_player_name=incident_data.get(
-                        "participatingPlayerName"
-                    ),
-                    field=incident_data["field"],
-                    period=incident_data["period"],
-                )
-                incidents.append(incident)
+            incidents.extend(_build_incidents(match_data))
 
             # Collect bets
-            bets_data = match_data.get("bets", {}) or {}
-            for bet_type, bet_data in bets_data.items():
-                if not bet_data:
-                    continue
-
-                offers = bet_data.get("offers", []) or []
-                for offer in offers:
-                    bet = Bet(
-                        match_id=match_id,
-                        bet_name=bet_data["betName"],
-                        odds_decimal=float(offer["oddsDecimal"]),
-                        odds_fractional=offer["oddsFractional"],
-                        provider_id=offer["providerId"],
-                        click_out_url=offer["clickOutUrl"],
-                    )
-                    bets.append(bet)
+            bets.extend(_build_bets(match_data))
 
     # Bulk insert all records
-    session.bulk_save_objects(tournaments.values())
-    session.bulk_save_objects(teams.values())
-    session.bulk_save_objects(matches)
-    session.bulk_save_objects(incidents)
-    session.bulk_save_objects(bets)
-    session.commit()
+    tables = [model.__tablename__ for model in (Tournament, Team, Match, Incident, Bet)]
+    with _bulk_load(session, defer_indexes, *tables):
+        session.bulk_save_objects(tournaments.values())
+        session.bulk_save_objects(teams.values())
+        session.bulk_save_objects(matches)
+        session.bulk_save_objects(incidents)
+        session.bulk_save_objects(bets)
+        session.commit()
     logger.info("Data has been loaded successfully!")
+    return [match.id for match in matches]
+
+
+def upsert_matches(tournaments: list[dict]) -> list[int]:
+    """Inserts or updates the given matches with their incidents and bets.
+
+    Unlike :func:`load_data`, existing rows are overwritten, which is what live
+    updates of in-play matches need. Returns the ids of the upserted matches.
+    """
+    session = SessionLocal()
+    match_ids = []
+    for tournament_data in tournaments:
+        session.merge(_build_tournament(tournament_data))
+        for match_data in tournament_data["matches"]:
+            for team in _build_teams(match_data):
+                session.merge(team)
+            session.merge(_build_match(match_data, tournament_data))
+            match_ids.append(match_data["id"])
+
+    session.query(Incident).filter(Incident.match_id.in_(match_ids)).delete()
+    session.query(Bet).filter(Bet.match_id.in_(match_ids)).delete()
+    for tournament_data in tournaments:
+        for match_data in tournament_data["matches"]:
+            session.add_all(_build_incidents(match_data))
+            session.add_all(_build_bets(match_data))
+
+    session.commit()
+    session.close()
+    logger.info(f"{len(match_ids)} matches have been upserted.")
+    return match_ids
+
 
+def populate_data(defer_indexes: bool = False):
+    """Loads every scraped file.
 
-def populate_data():
+    ``defer_indexes`` is meant for the full load of ``--populate``: a run
+    killed midway leaves the tables without their secondary indexes.
+    """
     logger.info("Starting data population...")
-    load_data()
-    populate_incident_events()
+    match_ids = load_data(defer_indexes=defer_indexes)
+    match_ids.extend(populate_incident_events(defer_indexes=defer_indexes))
+    populate_lineups(defer_indexes=defer_indexes)
+    materialize_stats(match_ids)
     logger.info("Data population has been completed successfully!")
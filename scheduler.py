@@ -0,0 +1,225 @@
+import asyncio
+from collections import deque
+from datetime import date
+from urllib.parse import urlparse
+
+from tqdm.asyncio import tqdm
+
+from archive import save_manifests, store_page
+from backfill import discovery_months
+from constants import CONCURRENCY_LIMIT, CRAWL_WORKERS, HOST_CONCURRENCY_LIMIT
+from fetcher import HybridFetcher
+from journal import FAILED, FETCHED, MATCH, PARSED, CrawlJournal
+from logger import logger
+from parsers import parse_base_url
+from pipeline import publish_tournaments
+from scraper import find_matches_url_by_tournaments, get_tournaments_by_month
+from utils import fetch_url, get_client
+from writer import get_writer
+
+
+class FairQueue:
+    """Work queue that hands out items round-robin across leagues.
+
+    A league with hundreds of matches cannot starve the others, and every
+    league finishes at roughly the same pace.
+    """
+
+    def __init__(self):
+        self._queues: dict[str, deque] = {}
+        self._ring: deque[str] = deque()
+        self._condition = asyncio.Condition()
+        self._closed = False
+
+    async def put_many(self, key: str, items: list) -> None:
+        if not items:
+            return
+
+        async with self._condition:
+            if key not in self._queues:
+                self._queues[key] = deque()
+            if not self._queues[key]:
+                self._ring.append(key)
+            self._queues[key].extend(items)
+            self._condition.notify_all()
+
+    async def close(self) -> None:
+        """No more items will be added, idle consumers can stop."""
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    async def get(self) -> tuple[str, object] | None:
+        """Returns the next ``(key, item)`` pair or None once the queue is drained."""
+        async with self._condition:
+            while not self._ring:
+                if self._closed:
+                    return None
+                await self._condition.wait()
+
+            key = self._ring.popleft()
+            item = self._queues[key].popleft()
+            if self._queues[key]:
+                self._ring.append(key)
+            return key, item
+
+
+class CrawlScheduler:
+    """Crawls the matches of many leagues through one global work queue.
+
+    Tournament discovery of every league runs concurrently and feeds match URLs
+    into a :class:`FairQueue` while workers are already fetching. All requests
+    share one httpx client (or one browser pool with ``playwright``) and each
+    host is limited to ``HOST_CONCURRENCY_LIMIT`` requests in flight. With
+    ``hybrid`` pages go through httpx and only blocked ones through a browser.
+    Only the matches between ``start`` and ``end`` are discovered, and a match
+    found through several leagues or months is queued once.
+    """
+
+    def __init__(
+        self,
+        playwright: bool = False,
+        journal: CrawlJournal = None,
+        hybrid: bool = False,
+        workers: int = CRAWL_WORKERS,
+        host_limit: int = HOST_CONCURRENCY_LIMIT,
+        start: date = None,
+        end: date = None,
+    ):
+        self.playwright = playwright
+        self.journal = journal
+        self.hybrid = hybrid
+        self.workers = workers
+        self.host_limit = host_limit
+        self.start = start
+        self.end = end
+        self.queue = FairQueue()
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._client = None
+        self._pool = None
+        self._fetcher = None
+        self._progress = None
+        self._seen_match_ids: set[int] = set()
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.host_limit)
+        return self._host_semaphores[host]
+
+    async def _fetch(self, url: str) -> str | None:
+        async with self._host_semaphore(url):
+            if self.playwright:
+                return await self._pool.fetch(url)
+            if self.hybrid:
+                return await self._fetcher.fetch(url)
+
+            content = await fetch_url(self._client, url)
+            return content.decode("utf-8") if content else None
+
+    async def _discover(self, league_url: str, semaphore: asyncio.Semaphore) -> None:
+        base_match_url, base_data_url, league_name = parse_base_url(league_url)
+        months = discovery_months(league_name, self.start, self.end)
+        host = self._host_semaphore(base_data_url)
+        async with semaphore:
+            try:
+                if self.playwright:
+                    from crawler import get_tournaments_by_month_by_pw
+
+                    tournaments = await get_tournaments_by_month_by_pw(
+                        base_data_url, months, self._pool, host
+                    )
+                else:
+                    tournaments = await get_tournaments_by_month(
+                        self._client, base_data_url, months, host
+                    )
+                    if self.hybrid and not tournaments:
+                        from crawler import get_tournaments_by_month_by_pw
+
+                        tournaments = await get_tournaments_by_month_by_pw(
+                            base_data_url,
+                            months,
+                            await self._fetcher.browser_pool(),
+                            host,
+                        )
+            except Exception as e:
+                logger.error(f"Failed to discover matches of {league_url}: {e}")
+                if self.journal:
+                    self.journal.mark(league_url, FAILED, str(e))
+                return
+
+        match_urls = await find_matches_url_by_tournaments(
+            tournaments,
+            base_match_url,
+            league_name,
+            self._seen_match_ids,
+            self.start,
+            self.end,
+        )
+        await publish_tournaments(
+            [tournament for month in tournaments.values() for tournament in month]
+        )
+        if self.journal:
+            self.journal.add(match_urls, MATCH, parent=league_url)
+            match_urls = self.journal.unfinished(match_urls)
+
+        self._progress.total += len(match_urls)
+        self._progress.refresh()
+        await self.queue.put_many(
+            league_url, [(league_name, url) for url in match_urls]
+        )
+
+    async def _process(self, league_name: str, url: str, content: str | None) -> None:
+        if not content:
+            logger.error(f"Failed to fetch {url}")
+            if self.journal:
+                self.journal.mark(url, FAILED, "Empty response")
+            return
+
+        month = url.split("x-month=")[1]
+        match_id = url.split("/")[4]
+        if self.journal:
+            self.journal.mark(url, FETCHED)
+
+        try:
+            await store_page(content, league_name, month, match_id)
+        except Exception as e:
+            logger.error(f"Failed to parse {url}: {e}")
+            if self.journal:
+                self.journal.mark(url, FAILED, str(e))
+            return
+
+        if self.journal:
+            self.journal.mark(url, PARSED)
+
+    async def _worker(self) -> None:
+        while (entry := await self.queue.get()) is not None:
+            _, (league_name, url) = entry
+            content = await self._fetch(url)
+            await self._process(league_name, url, content)
+            self._progress.update(1)
+
+    async def _run(self, league_urls: list[str]) -> None:
+        semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        await asyncio.gather(*(self._discover(url, semaphore) for url in league_urls))
+        await self.queue.close()
+        await asyncio.gather(*workers)
+        await get_writer().flush()
+        save_manifests()
+
+    async def run(self, league_urls: list[str]) -> None:
+        with tqdm(total=0, desc="Scraping Matches", unit="url") as self._progress:
+            if self.playwright:
+                from crawler import BrowserPool
+
+                async with BrowserPool() as self._pool:
+                    await self._run(league_urls)
+            elif self.hybrid:
+                async with HybridFetcher() as self._fetcher:
+                    self._client = self._fetcher.client
+                    await self._run(league_urls)
+            else:
+                self._client = get_client()
+                await self._run(league_urls)
@@ -0,0 +1,131 @@
+import msgspec
+
+
+class Code(msgspec.Struct, rename="camel", gc=False):
+    """``{"value": ..., "displayName": ...}`` pairs such as event types."""
+
+    value: int | None = None
+    display_name: str | None = None
+
+
+class Event(msgspec.Struct, rename="camel"):
+    id: int
+    event_id: int | None = None
+    minute: int | None = None
+    second: int | None = None
+    team_id: int | None = None
+    player_id: int | None = None
+    x: float | None = None
+    y: float | None = None
+    expanded_minute: int | None = None
+    period: Code | None = None
+    type: Code | None = None
+    outcome_type: Code | None = None
+    qualifiers: list = []
+    satisfied_events_types: list[int] = []
+    is_touch: bool = False
+    end_x: float | None = None
+    end_y: float | None = None
+    goal_mouth_x: float | None = None
+    goal_mouth_y: float | None = None
+    related_event_id: int | None = None
+    related_player_id: int | None = None
+    card_type: Code | None = None
+    is_goal: bool = False
+    is_shot: bool = False
+
+
+class Player(msgspec.Struct, rename="camel"):
+    player_id: int
+    name: str | None = None
+    shirt_no: int | None = None
+    position: str | None = None
+    height: int | None = None
+    weight: int | None = None
+    age: int | None = None
+    is_first_eleven: bool = False
+    is_man_of_the_match: bool = False
+    subbed_in_expanded_minute: int | None = None
+    subbed_out_expanded_minute: int | None = None
+    stats: dict = {}
+
+
+class FormationPosition(msgspec.Struct, gc=False):
+    vertical: float
+    horizontal: float
+
+
+class Formation(msgspec.Struct, rename="camel"):
+    formation_name: str
+    formation_id: int | None = None
+    captain_player_id: int | None = None
+    period: int | None = None
+    start_minute_expanded: int | None = None
+    end_minute_expanded: int | None = None
+    jersey_numbers: list[int] = []
+    formation_slots: list[int] = []
+    player_ids: list[int] = []
+    formation_positions: list[FormationPosition] = []
+
+
+class TeamLineup(msgspec.Struct, rename="camel"):
+    team_id: int | None = None
+    name: str | None = None
+    manager_name: str | None = None
+    players: list[Player] = []
+    formations: list[Formation] = []
+
+
+class MatchCentreLineups(msgspec.Struct, rename="camel"):
+    home: TeamLineup = msgspec.field(default_factory=TeamLineup)
+    away: TeamLineup = msgspec.field(default_factory=TeamLineup)
+    player_id_name_dictionary: dict[int, str] = {}
+
+    @property
+    def teams(self) -> tuple[TeamLineup, TeamLineup]:
+        return self.home, self.away
+
+
+class TeamEvents(msgspec.Struct, rename="camel"):
+    incident_events: list[Event] = []
+
+
+class MatchCentreEvents(msgspec.Struct, rename="camel"):
+    """The incident events of ``matchCentreData``.
+
+    Lineups and formations are decoded separately, so a malformed formation
+    doesn't reject the events of its match.
+    """
+
+    home: TeamEvents = msgspec.field(default_factory=TeamEvents)
+    away: TeamEvents = msgspec.field(default_factory=TeamEvents)
+
+    @property
+    def incident_events(self) -> list[Event]:
+        return self.home.incident_events + self.away.incident_events
+
+
+# Lax mode accepts integral floats such as ``"id": 2.5e9``, anything with the
+# wrong shape still raises ``msgspec.ValidationError``.
+_events_decoder = msgspec.json.Decoder(MatchCentreEvents, strict=False)
+# Skips the incident events, which make up most of a file.
+_lineups_decoder = msgspec.json.Decoder(MatchCentreLineups, strict=False)
+
+
+def decode_incident_events(raw: bytes) -> MatchCentreEvents:
+    """Decodes a ``match_centre_data_<id>.json`` file straight into structs.
+
+    Keys that are not part of the schema are skipped without being decoded.
+    """
+    return _events_decoder.decode(raw)
+
+
+def load_incident_events(json_file: str) -> MatchCentreEvents:
+    with open(json_file, "rb") as file:
+        return decode_incident_events(file.read())
+
+
+def load_lineups(json_file: str) -> MatchCentreLineups:
+    """Like :func:`load_incident_events`, for the lineups and formations."""
+    with open(json_file, "rb") as file:
+        return _lineups_decoder.decode(file.read())
@@ -4,14 +4,27 @@ import json
 import os
 import time
 from collections import defaultdict
+from datetime import date
 
 import httpx
 from tqdm.asyncio import tqdm
 
+from archive import save_manifests, store_page
+from backfill import LIVESCORES_URL, recent_days, is_in_range
 from constants import RETRY_LIMIT
 from logger import logger
-from parsers import parse_base_data, parse_base_url, parse_match_html
-from utils import HEADERS, fetch_url, find_valid_urls, write_file
+from metadata import metadata
+from parsers import parse_base_data
+from pipeline import publish_tournaments, write_json_files
+from utils import (
+    HEADERS,
+    create_sync_client,
+    fetch_url,
+    fetch_urls,
+    find_valid_urls,
+    get_client,
+)
+from writer import write_file_async
 
 
 def fetch_base_data(playwright: bool = False, retry: int = 0) -> None:
@@ -47,9 +60,8 @@ def fetch_base_data(playwright: bool = False, retry: int = 0) -> None:
             browser.close()
 
     else:
-        client = httpx.Client(headers=HEADERS)
-
-        response = client.get("https://www.whoscored.com/")
+        with create_sync_client() as client:
+            response = client.get("https://www.whoscored.com/")
         if response.status_code != 200:
             return _retry()
 
@@ -61,12 +73,17 @@ def fetch_base_data(playwright: bool = False, retry: int = 0) -> None:
 async def get_tournaments_by_month(
     client: httpx.AsyncClient,
     base_url: str,
+    months: list[tuple[int, int]],
+    limit: asyncio.Semaphore = None,
 ) -> dict[str, list[dict]]:
-    tasks = [fetch_url(client, base_url.format(month=month)) for month in range(1, 13)]
-    responses = await asyncio.gather(*tasks)
+    responses = await fetch_urls(
+        client,
+        [base_url.format(year=year, month=month) for year, month in months],
+        limit=limit,
+    )
 
     tournaments_by_month = defaultdict(list)
-    for response, month in zip(responses, range(1, 13)):
+    for response, (_, month) in zip(responses, months):
         try:
             tournament_data = json.loads(response)
             tournaments = tournament_data.get("tournaments", [])
@@ -80,19 +97,30 @@ async def get_tournaments_by_month(
     return tournaments_by_month
 
 
-def find_matches_url_by_tournaments(
+async def find_matches_url_by_tournaments(
     tournaments_by_month: dict[str, list[dict]],
     base_url: str,
     league_name: str,
+    seen: set[int] = None,
+    start: date = None,
+    end: date = None,
 ) -> list[str]:
+    """The match URLs of the monthly fixtures, each match only once.
+
+    Matches whose id is in ``seen`` are skipped and the others added to it,
+    so a run sharing ``seen`` between leagues never fetches a match twice.
+    Only the matches starting between ``start`` and ``end`` are returned.
+    """
+    seen = set() if seen is None else seen
     match_urls = []
     for month, tournaments in tournaments_by_month.items():
         os.makedirs(f"matches/{league_name}/{month}", exist_ok=True)
-        write_file(
-            f"matches/{league_name}/{month}/matches.json",
-            tournaments,
-            is_json=True,
-        )
+        if write_json_files():
+            await write_file_async(
+                f"matches/{league_name}/{month}/matches.json",
+                tournaments,
+                is_json=True,
+            )
 
         matches = []
         for tournament in tournaments:
@@ -102,6 +130,10 @@ def find_matches_url_by_tournaments(
             continue
 
         for match in matches:
+            if match["id"] in seen or not is_in_range(match, start, end):
+                continue
+            seen.add(match["id"])
+
             home_team = match["homeTeamName"].replace(" ", "-").replace(".", "")
             away_team = match["awayTeamName"].replace(" ", "-").replace(".", "")
             match_url = base_url.format(
@@ -115,62 +147,42 @@ def find_matches_url_by_tournaments(
     return match_urls
 
 
-async def get_matches_by_month(base_url: str) -> None:
-    base_match_url, base_data_url, league_name = parse_base_url(base_url)
+def get_match_url(league_name: str, match: dict) -> str:
+    home_team = match["homeTeamName"].replace(" ", "-").replace(".", "")
+    away_team = match["awayTeamName"].replace(" ", "-").replace(".", "")
+    return (
+        f"https://www.whoscored.com/Matches/{match['id']}/Live/"
+        f"{league_name}-{home_team}-{away_team}"
+    )
 
-    limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
-    async with httpx.AsyncClient(headers=HEADERS, limits=limits) as client:
-        tournaments = await get_tournaments_by_month(client, base_data_url)
-        match_urls = find_matches_url_by_tournaments(
-            tournaments,
-            base_match_url,
-            league_name,
-        )
-        tasks = [fetch_url(client, url) for url in match_urls]
-        responses = await asyncio.gather(*tasks)
 
-    for response, url in tqdm(zip(responses, match_urls), total=len(match_urls)):
-        month = url.split("x-month=")[1]
-        match_id = url.split("/")[4]
+async def update_matches_by_recent_matches(
+    start: date = None, end: date = None
+) -> None:
+    """Fetches the matches played between ``start`` and ``end``.
 
-        content = response.decode("utf-8")
-        write_file(f"matches/{league_name}/{month}/raw_html_{match_id}.html", content)
-
-        parse_match_html(content, month, league_name)
-
-
-async def update_matches_by_recent_matches() -> None:
-    now = time.localtime()
-    month = now.tm_mon
-    month_name = calendar.month_name[month]
-    day = now.tm_mday
-
-    today_url = f"https://www.whoscored.com/livescores/data?d=2024{month:02d}{day:02d}&isSummary=true"
-    yesterday_url = f"https://www.whoscored.com/livescores/data?d=2024{month:02d}{day - 1:02d}&isSummary=true"
-
-    limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
-    async with httpx.AsyncClient(headers=HEADERS, limits=limits) as client:
-        responses = await asyncio.gather(
-            fetch_url(client, today_url), fetch_url(client, yesterday_url)
-        )
+    Without a range, yesterday's and today's matches are fetched. A match
+    listed on several days is fetched once.
+    """
+    days = recent_days(start, end)
 
-    with open("matches/all_regions.json", "r", encoding="utf-8") as file:
-        region_data = json.load(file)
+    client = get_client()
+    responses = await fetch_urls(
+        client, [LIVESCORES_URL.format(day=day) for day in days]
+    )
 
-    tournament_name_league_mapping = {}
-    for region in region_data:
-        for league in region["tournaments"]:
-            key = f"{region['id']}_{league['id']}"
-            tournament_name_league_mapping[key] = (
-                "https://www.whoscored.com" + league["url"]
-            )
+    tournament_name_league_mapping = metadata.tournament_league_mapping
 
     tournaments = []
     base_tournament_urls = []
-    for response, day in zip(responses, [day, day - 1]):
+    for response, day in zip(responses, days):
+        if not response:
+            logger.error(f"No livescores found for {day}")
+            continue
+
         for tournament in json.loads(response)["tournaments"]:
-            tournament["x-day"] = day
-            tournaments.append(tournament)
+            tournament["x-day"] = day.day
+            tournaments.append((day, tournament))
             base_tournament_urls.append(
                 tournament_name_league_mapping[
                     f"{tournament['regionId']}_{tournament['tournamentId']}"
@@ -179,49 +191,53 @@ async def update_matches_by_recent_matches() -> None:
 
     await find_valid_urls(base_tournament_urls)
 
-    with open("matches/tournament_url_mapping.json", "r", encoding="utf-8") as f:
-        tournament_url_mapping = json.load(f)
     match_url_by_league = defaultdict(list)
+    seen = set()
 
-    for tournament in tournaments:
-        league_name = tournament_url_mapping[
+    for day, tournament in tournaments:
+        valid_url = metadata.resolve(
             tournament_name_league_mapping[
                 f"{tournament['regionId']}_{tournament['tournamentId']}"
             ]
-        ].split("/")[-1]
-        os.makedirs(f"matches/{league_name}/{month_name}", exist_ok=True)
-        match_day = tournament["x-day"]
-        write_file(
-            f"matches/{league_name}/{month_name}/matches_{match_day:02d}.json",
-            [tournament],
-            is_json=True,
         )
+        if not valid_url:
+            continue
+
+        league_name = valid_url.split("/")[-1]
+        month_name = calendar.month_name[day.month]
+        os.makedirs(f"matches/{league_name}/{month_name}", exist_ok=True)
+        if write_json_files():
+            await write_file_async(
+                f"matches/{league_name}/{month_name}/matches_{day.day:02d}.json",
+                [tournament],
+                is_json=True,
+            )
+        await publish_tournaments([tournament])
 
-        base_url = f"https://www.whoscored.com/Matches/{{match_id}}/Live/{league_name}-{{home_team}}-{{away_team}}"
         for match in tournament["matches"]:
-            home_team = match["homeTeamName"].replace(" ", "-").replace(".", "")
-            away_team = match["awayTeamName"].replace(" ", "-").replace(".", "")
-            match_url = base_url.format(
-                match_id=match["id"], home_team=home_team, away_team=away_team
+            if match["id"] in seen:
+                continue
+            seen.add(match["id"])
+            match_url_by_league[league_name].append(
+                (month_name, get_match_url(league_name, match))
+            )
+
+    client = get_client()
+    for league_name, urls in tqdm(
+        match_url_by_league.items(), desc="Fetching matches..."
+    ):
+        tasks = [fetch_url(client, url) for _, url in urls]
+        responses = await asyncio.gather(*tasks)
+
+        for response, (month_name, url) in zip(responses, urls):
+            logger.info(f"Fetching match: {url}")
+            if not response:
+                logger.error(f"Failed to fetch {url}")
+                continue
+
+            match_id = url.split("/")[4]
+            await store_page(
+                response.decode("utf-8"), league_name, month_name, match_id
             )
 
-            match_url_by_league[league_name].append(match_url)
-
-    limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
-    async with httpx.AsyncClient(headers=HEADERS, limits=limits) as client:
-        for league_name, urls in tqdm(
-            match_url_by_league.items(), desc="Fetching matches..."
-        ):
-            tasks = [fetch_url(client, url) for url in urls]
-            responses = await asyncio.gather(*tasks)
-
-            for response, url in zip(responses, urls):
-                logger.info(f"Fetching match: {url}")
-                match_id = url.split("/")[4]
-                content = response.decode("utf-8")
-                write_file(
-                    f"matches/{league_name}/{month_name}/raw_html_{match_id}.html",
-                    content,
-                )
-
-                parse_match_html(content, month_name, league_name)
+    save_manifests()
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import NamedTuple
+
+REGION = "region"
+TOURNAMENT = "tournament"
+
+NGRAM_SIZE = 3
+FUZZY_THRESHOLD = 0.3
+
+
+class SearchEntry(NamedTuple):
+    kind: str
+    name: str
+    region: str
+    url: str | None = None
+
+
+def normalize(text: str) -> str:
+    """Lowercases, strips accents and collapses punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+
+def ngrams(text: str, size: int = NGRAM_SIZE) -> set[str]:
+    padded = f" {text} "
+    return {padded[i : i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+
+class _TrieNode:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.entries: set[int] = set()
+
+
+class SearchIndex:
+    """Prefix trie and n-gram index over regions and their tournaments.
+
+    A query matches an entry when every query word is a prefix of one of its
+    words, so "eng prem" finds "England Premier League". Queries without a
+    prefix match fall back to n-gram similarity, which tolerates typos such as
+    "premeir league". Tournaments are indexed together with their region name.
+    """
+
+    def __init__(self, regions: list[dict], base_url: str = ""):
+        self.entries: list[SearchEntry] = []
+        self._grams: list[set[str]] = []
+        self._root = _TrieNode()
+        self._ngrams: dict[str, set[int]] = defaultdict(set)
+
+        for region in regions:
+            self._add(SearchEntry(REGION, region["name"], region["name"]))
+            for tournament in region.get("tournaments", []):
+                self._add(
+                    SearchEntry(
+                        TOURNAMENT,
+                        tournament["name"],
+                        region["name"],
+                        f"{base_url}{tournament['url']}",
+                    )
+                )
+
+    def _add(self, entry: SearchEntry) -> None:
+        entry_id = len(self.entries)
+        key = normalize(
+            entry.name if entry.kind == REGION else f"{entry.region} {entry.name}"
+        )
+        self.entries.append(entry)
+        self._grams.append(ngrams(key))
+
+        for word in key.split():
+            node = self._root
+            for char in word:
+                node = node.children.setdefault(char, _TrieNode())
+                node.entries.add(entry_id)
+
+        for gram in self._grams[entry_id]:
+            self._ngrams[gram].add(entry_id)
+
+    def _prefix(self, word: str) -> set[int]:
+        node = self._root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.entries
+
+    def _similarity(self, query_grams: set[str], entry_id: int, shared: int) -> float:
+        """Dice coefficient of the query and entry n-grams."""
+        return 2 * shared / (len(query_grams) + len(self._grams[entry_id]))
+
+    def search(
+        self, query: str, kind: str = None, limit: int = None
+    ) -> list[SearchEntry]:
+        """Returns the entries matching ``query``, best matches first."""
+        query = normalize(query)
+        if not query:
+            return []
+
+        query_grams = ngrams(query)
+        words = query.split()
+        candidates = set(self._prefix(words[0]))
+        for word in words[1:]:
+            candidates &= self._prefix(word)
+
+        if candidates:
+            shared = {
+                entry_id: len(query_grams & self._grams[entry_id])
+                for entry_id in candidates
+            }
+        else:
+            shared = defaultdict(int)
+            for gram in query_grams:
+                for entry_id in self._ngrams.get(gram, ()):
+                    shared[entry_id] += 1
+
+        scored = []
+        for entry_id, count in shared.items():
+            if kind and self.entries[entry_id].kind != kind:
+                continue
+            score = self._similarity(query_grams, entry_id, count)
+            if candidates or score >= FUZZY_THRESHOLD:
+                scored.append((score, entry_id))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.entries[entry_id] for _, entry_id in scored[:limit]]
@@ -1,14 +1,31 @@
 import asyncio
+import contextlib
 import glob
-import json
+import hashlib
 import os
+import socket
+import time
 
+import httpcore
 import httpx
 from bs4 import BeautifulSoup
 from tqdm.asyncio import tqdm
 
-from constants import RETRY_LIMIT
+from constants import (
+    BACKFILL_WINDOW,
+    DNS_CACHE_TTL,
+    HTTP2,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT,
+    RETRY_LIMIT,
+    WRITER_FSYNC,
+)
 from logger import logger
+from metadata import metadata
+from writer import write_atomic
 
 HEADERS = {
     "Dnt": "1",
@@ -22,11 +39,171 @@ HEADERS = {
 }
 
 
-async def fetch_url(client, url: str, retry: int = 0) -> bytes:
+class CachingResolverBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that caches DNS lookups for ``ttl`` seconds.
+
+    Every resolved address is cached and tried in order until one connects,
+    so hosts with several A/AAAA records keep their IPv4/IPv6 fallback. Only
+    the TCP connect uses the cached addresses, TLS still verifies and sends
+    SNI for the original host name.
+    """
+
+    def __init__(self, ttl: float = DNS_CACHE_TTL):
+        self.ttl = ttl
+        self._backend = httpcore.AnyIOBackend()
+        self._cache: dict[tuple[str, int], tuple[list[str], float]] = {}
+
+    async def _resolve(self, host: str, port: int) -> list[str]:
+        cached = self._cache.get((host, port))
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, port, type=socket.SOCK_STREAM
+            )
+        except OSError as e:
+            # httpx reports failed lookups as connect errors, keep it that way.
+            raise httpcore.ConnectError(str(e)) from e
+
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if addresses:
+            self._cache[(host, port)] = (addresses, time.monotonic() + self.ttl)
+        return addresses
+
+    async def connect_tcp(
+        self, host, port, timeout=None, local_address=None, socket_options=None
+    ):
+        error = httpcore.ConnectError(f"No address found for {host}")
+        for address in await self._resolve(host, port):
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+
+        # None of the cached addresses work, resolve again next time.
+        self._cache.pop((host, port), None)
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+def _http2_available() -> bool:
+    if not HTTP2:
+        return False
+
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2 is enabled but 'h2' is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def _client_options() -> dict:
+    return {
+        "headers": HEADERS,
+        "http2": _http2_available(),
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    }
+
+
+def create_client() -> httpx.AsyncClient:
+    """Builds an ``httpx.AsyncClient`` configured from the ``HTTP_*`` settings."""
+    options = _client_options()
+    transport = httpx.AsyncHTTPTransport(
+        http2=options["http2"], limits=options.pop("limits")
+    )
+    if DNS_CACHE_TTL:
+        # httpx has no public hook for the network backend of its pool.
+        transport._pool._network_backend = CachingResolverBackend(DNS_CACHE_TTL)
+    return httpx.AsyncClient(transport=transport, **options)
+
+
+def create_sync_client() -> httpx.Client:
+    return httpx.Client(**_client_options())
+
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the client shared by every phase of a run, creating it on first use.
+
+    Reusing one client keeps its connections (and TLS sessions) alive between
+    tournament discovery, URL resolution and match fetching.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@contextlib.asynccontextmanager
+async def shared_client():
+    try:
+        yield get_client()
+    finally:
+        await close_client()
+
+
+class SingleFlight:
+    """Lets concurrent calls with the same key share one call in flight.
+
+    A caller arriving while the call of its key is running awaits that call's
+    result instead of starting another one. Nothing is cached once it is done.
+    """
+
+    def __init__(self):
+        self._calls: dict[object, asyncio.Future] = {}
+
+    async def do(self, key, function, *args):
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(function(*args))
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # A cancelled caller must not cancel the call of the others.
+        return await asyncio.shield(future)
+
+
+_fetches = SingleFlight()
+
+
+async def fetch_url(client, url: str) -> bytes:
+    """Fetches ``url``, sharing the request with concurrent fetches of it."""
+    return await _fetches.do(url, _fetch_url, client, url)
+
+
+async def _fetch_url(client, url: str, retry: int = 0) -> bytes:
     async def _retry():
         if retry < RETRY_LIMIT:
             await asyncio.sleep(1)
-            return await fetch_url(client, url, retry=retry + 1)
+            return await _fetch_url(client, url, retry=retry + 1)
         logger.error("Failed to fetch %s after 3 retries", url)
         return b""
 
@@ -39,59 +216,64 @@ async def fetch_url(client, url: str, retry: int = 0) -> bytes:
         return await _retry()
 
 
+async def fetch_urls(
+    client,
+    urls: list[str],
+    window: int = BACKFILL_WINDOW,
+    limit: asyncio.Semaphore = None,
+) -> list:
+    """Fetches ``urls`` with up to ``window`` requests in flight, in order.
+
+    Every request also holds ``limit``, e.g. the semaphore of its host.
+    """
+    semaphore = asyncio.Semaphore(window)
+
+    async def fetch(url: str) -> bytes:
+        async with semaphore, limit or contextlib.nullcontext():
+            return await fetch_url(client, url)
+
+    return await asyncio.gather(*(fetch(url) for url in urls))
+
+
+def content_hash(content: bytes | str) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
 def write_file(file_name, content, is_json=False):
-    with open(file_name, "w", encoding="utf-8") as file:
-        if is_json:
-            json.dump(content, file, ensure_ascii=False, indent=4)
-        else:
-            file.write(content)
+    write_atomic(file_name, content, is_json=is_json, fsync=WRITER_FSYNC)
 
 
 async def find_valid_urls(tournament_urls: list[str]) -> None:
     """We have a list of URLs that has not season id and stage id.
 
     We need to find full URLs that contain season id and stage id.
+    Resolutions are memoized by the metadata service, so only unknown or
+    expired URLs are fetched.
     """
     logger.info("Finding valid URLs...")
-    tournament_url_mapping = {}
-
-    if os.path.exists("matches/tournament_url_mapping.json"):
-        with open("matches/tournament_url_mapping.json", "r", encoding="utf-8") as f:
-            existing_tournament_url_mapping = json.load(f)
-            existing_tournament_url_mapping.update(tournament_url_mapping)
-            tournament_url_mapping = existing_tournament_url_mapping
-
-    tournament_urls = tuple(
-        filter(lambda url: url not in tournament_url_mapping, tournament_urls)
-    )
+    tournament_urls = metadata.unresolved(tournament_urls)
     if not tournament_urls:
         return
 
-    async with httpx.AsyncClient(headers=HEADERS) as client:
-        responses = []
-        for url in tqdm(tournament_urls, desc="Finding valid URLs"):
-            response = await fetch_url(client, url)
-            responses.append(response)
-
-        for response, url in tqdm(
-            zip(responses, tournament_urls),
-            desc="Finding valid URLs",
-        ):
-            if not response:
-                continue
-
-            soup = BeautifulSoup(response, "lxml")
-            canonical_link = soup.find("link", {"rel": "canonical"})
-            if not canonical_link:
-                logger.error("No valid link found for %s", url)
-                continue
-
-            valid_url = canonical_link["href"]
-            tournament_url_mapping[url] = valid_url
-
-        write_file(
-            "matches/tournament_url_mapping.json", tournament_url_mapping, is_json=True
-        )
+    client = get_client()
+    responses = await tqdm.gather(
+        *(fetch_url(client, url) for url in tournament_urls),
+        desc="Finding valid URLs",
+    )
+
+    for response, url in zip(responses, tournament_urls):
+        if not response:
+            continue
+
+        soup = BeautifulSoup(response, "lxml")
+        canonical_link = soup.find("link", {"rel": "canonical"})
+        if not canonical_link:
+            logger.error("No valid link found for %s", url)
+            continue
+
+        metadata.set_url(url, canonical_link["href"])
 
 
 def find_incident_event_files():
@@ -102,6 +284,18 @@ def find_incident_event_files():
     return match_files
 
 
+def find_event_type_files():
+    pattern = os.path.join("matches", "**", "match_centre_event_type.json")
+
+    return glob.glob(pattern, recursive=True)
+
+
+def find_raw_html_files():
+    pattern = os.path.join("matches", "**", "raw_html_*.html")
+
+    return glob.glob(pattern, recursive=True)
+
+
 def find_match_files():
     pattern = os.path.join("matches", "**", "matches*.json")
 
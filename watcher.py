@@ -0,0 +1,166 @@
+import asyncio
+import calendar
+import json
+import os
+from collections import defaultdict
+from datetime import date
+
+import httpx
+
+from aggregates import materialize_stats
+from archive import forget_page, save_manifests, store_page
+from constants import WATCH_INTERVAL
+from logger import logger
+from populate import populate_incident_events, populate_lineups, upsert_matches
+from metadata import metadata
+from scraper import get_match_url
+from utils import fetch_url, find_valid_urls, get_client
+
+
+class LivescoreWatcher:
+    """Polls today's livescores and refreshes only the matches that changed.
+
+    Every poll is compared with the previous snapshot by match id. Only
+    matches whose status, score or incidents differ are fetched, parsed and
+    upserted, so in-play updates reach the database within one interval.
+    """
+
+    def __init__(self, interval: int = WATCH_INTERVAL):
+        self.interval = interval
+        self.snapshot: dict[int, tuple] = {}
+
+    @staticmethod
+    def fingerprint(match: dict) -> tuple:
+        return (
+            match.get("status"),
+            match.get("period"),
+            match.get("homeScore"),
+            match.get("awayScore"),
+            json.dumps(match.get("incidents") or [], sort_keys=True),
+        )
+
+    def diff(self, tournaments: list[dict]) -> list[dict]:
+        """Returns the tournaments reduced to the matches changed since last poll.
+
+        The snapshot is not updated here, see :meth:`commit`.
+        """
+        changed_tournaments = []
+        for tournament in tournaments:
+            changed_matches = []
+            for match in tournament.get("matches", []):
+                if self.snapshot.get(match["id"]) != self.fingerprint(match):
+                    changed_matches.append(match)
+
+            if changed_matches:
+                changed_tournaments.append({**tournament, "matches": changed_matches})
+        return changed_tournaments
+
+    def commit(self, matches: list[dict]) -> None:
+        """Records matches as refreshed, a failed match is retried next poll."""
+        for match in matches:
+            self.snapshot[match["id"]] = self.fingerprint(match)
+
+    async def _league_names(self, tournaments: list[dict]) -> dict[int, str]:
+        base_urls = {
+            tournament["tournamentId"]: metadata.tournament_league_mapping[
+                f"{tournament['regionId']}_{tournament['tournamentId']}"
+            ]
+            for tournament in tournaments
+        }
+        await find_valid_urls(list(base_urls.values()))
+
+        league_names = {}
+        for tournament_id, url in base_urls.items():
+            if valid_url := metadata.resolve(url):
+                league_names[tournament_id] = valid_url.split("/")[-1]
+        return league_names
+
+    async def poll(self, client: httpx.AsyncClient) -> None:
+        today = date.today()
+        month_name = calendar.month_name[today.month]
+        response = await fetch_url(
+            client,
+            "https://www.whoscored.com/livescores/data"
+            f"?d={today:%Y%m%d}&isSummary=true",
+        )
+        if not response:
+            logger.error("Failed to fetch livescores, skipping this poll.")
+            return
+
+        tournaments = self.diff(json.loads(response).get("tournaments", []))
+        if not tournaments:
+            return
+
+        league_names = await self._league_names(tournaments)
+        match_urls = defaultdict(list)
+        for tournament in tournaments:
+            league_name = league_names.get(tournament["tournamentId"])
+            if not league_name:
+                continue
+
+            os.makedirs(f"matches/{league_name}/{month_name}", exist_ok=True)
+            for match in tournament["matches"]:
+                match_urls[league_name].append(
+                    (match, get_match_url(league_name, match))
+                )
+
+        jobs = [
+            (league_name, match, url)
+            for league_name, urls in match_urls.items()
+            for match, url in urls
+        ]
+        logger.info(f"{len(jobs)} matches changed, refreshing them...")
+        responses = await asyncio.gather(
+            *(fetch_url(client, url) for _, _, url in jobs)
+        )
+
+        refreshed = []
+        stored = []
+        for response, (league_name, match, url) in zip(responses, jobs):
+            if not response:
+                logger.error(f"Failed to fetch {url}")
+                continue
+
+            try:
+                # Unchanged pages are neither written, parsed nor populated again.
+                page = await store_page(
+                    response.decode("utf-8"), league_name, month_name, match["id"]
+                )
+            except Exception as e:
+                logger.error(f"Failed to parse {url}: {e}")
+                continue
+
+            refreshed.append(match)
+            if page:
+                stored.append((league_name, match["id"]))
+
+        # Manifests are saved once the data is populated. A page whose data
+        # didn't make it into the database is forgotten and parsed again.
+        try:
+            match_ids = upsert_matches(tournaments)
+            if stored:
+                files = [
+                    f"matches/{league_name}/{month_name}"
+                    f"/match_centre_data_{match_id}.json"
+                    for league_name, match_id in stored
+                ]
+                stored_ids = [match_id for _, match_id in stored]
+                populate_incident_events(files, stored_ids)
+                populate_lineups(files, stored_ids)
+            materialize_stats(match_ids)
+        except Exception:
+            for league_name, match_id in stored:
+                forget_page(league_name, month_name, match_id)
+            raise
+        finally:
+            save_manifests()
+        self.commit(refreshed)
+
+    async def run(self) -> None:
+        client = get_client()
+        while True:
+            try:
+                await self.poll(client)
+            except Exception as e:
+                logger.error(f"Livescore poll failed: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,197 @@
+import asyncio
+import contextlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import WRITER_BATCH_SIZE, WRITER_FSYNC, WRITER_QUEUE_SIZE, WRITER_THREADS
+from logger import logger
+
+
+def _dump(content, is_json: bool) -> str:
+    if is_json:
+        return json.dumps(content, ensure_ascii=False, indent=4)
+    return content
+
+
+def _write_temp(file_name: str, data: str, fsync: bool) -> str:
+    temp_name = f"{file_name}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(temp_name, "w", encoding="utf-8") as file:
+            file.write(data)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_name)
+        raise
+    return temp_name
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(file_name: str, content, is_json: bool = False, fsync=False) -> None:
+    """Writes to a temporary file next to ``file_name`` and renames it into place.
+
+    Readers never see a half-written file, even if the process dies mid-write.
+    """
+    temp_name = _write_temp(file_name, _dump(content, is_json), fsync)
+    os.replace(temp_name, file_name)
+    if fsync:
+        _fsync_directory(os.path.dirname(file_name))
+
+
+def _write_batch(
+    batch: list[tuple[str, object, bool]], fsync: bool
+) -> dict[str, Exception]:
+    """Writes a batch of files atomically, syncing every directory only once.
+
+    Returns the errors of the files that could not be written.
+    """
+    directories = set()
+    errors = {}
+    for file_name, content, is_json in batch:
+        try:
+            temp_name = _write_temp(file_name, _dump(content, is_json), fsync)
+            os.replace(temp_name, file_name)
+            directories.add(os.path.dirname(file_name))
+        except Exception as e:
+            logger.error(f"Failed to write {file_name}: {e}")
+            errors[file_name] = e
+
+    if fsync:
+        for directory in directories:
+            _fsync_directory(directory)
+    return errors
+
+
+class FileWriter:
+    """Writes files from a thread pool so disk I/O never blocks the event loop.
+
+    :meth:`write` only queues the file. The queue is bounded, so producers
+    slow down when the disk cannot keep up instead of buffering every page in
+    memory. Queued files are written in batches of up to ``batch_size`` and,
+    with ``fsync``, each batch costs one directory sync per directory.
+    """
+
+    def __init__(
+        self,
+        threads: int = WRITER_THREADS,
+        queue_size: int = WRITER_QUEUE_SIZE,
+        batch_size: int = WRITER_BATCH_SIZE,
+        fsync: bool = WRITER_FSYNC,
+    ):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._executor = None
+        self._consumers: list[asyncio.Task] = []
+
+    def _start(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="writer"
+        )
+        self._consumers = [
+            asyncio.create_task(self._consume()) for _ in range(self.threads)
+        ]
+
+    async def write(
+        self, file_name: str, content, is_json: bool = False
+    ) -> asyncio.Future:
+        """Queues a file.
+
+        The returned future is done once the file is on disk, its result is
+        the error of a failed write or None.
+        """
+        if not self._consumers:
+            self._start()
+        written = asyncio.get_running_loop().create_future()
+        await self.queue.put((file_name, content, is_json, written))
+        return written
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            errors = None
+            try:
+                errors = await loop.run_in_executor(
+                    self._executor,
+                    _write_batch,
+                    [item[:3] for item in batch],
+                    self.fsync,
+                )
+            except Exception as e:
+                errors = {file_name: e for file_name, *_ in batch}
+            finally:
+                for file_name, *_, written in batch:
+                    if errors is None:
+                        written.cancel()
+                    elif not written.done():
+                        written.set_result(errors.get(file_name))
+                    self.queue.task_done()
+
+    async def flush(self) -> None:
+        """Waits until every queued file is on disk."""
+        await self.queue.join()
+
+    async def close(self) -> None:
+        if not self._consumers:
+            return
+
+        await self.flush()
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._executor.shutdown()
+        self._consumers = []
+
+
+_writer: FileWriter | None = None
+
+
+def get_writer() -> FileWriter:
+    global _writer
+    if _writer is None:
+        _writer = FileWriter()
+    return _writer
+
+
+async def close_writer() -> None:
+    global _writer
+    if _writer is not None:
+        await _writer.close()
+        _writer = None
+
+
+@contextlib.asynccontextmanager
+async def shared_writer():
+    try:
+        yield get_writer()
+    finally:
+        await close_writer()
+
+
+async def write_file_async(
+    file_name: str, content, is_json: bool = False, wait: bool = False
+) -> None:
+    """Async counterpart of ``utils.write_file`` going through the shared writer.
+
+    The file is only queued, unless ``wait`` is set: then this returns once
+    the file is on disk and raises the error of a failed write.
+    """
+    written = await get_writer().write(file_name, content, is_json)
+    if wait and (error := await written):
+        raise error